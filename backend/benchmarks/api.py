@@ -0,0 +1,268 @@
+"""
+In-process API benchmark at several catalog sizes.
+
+For each size, builds an SQLite catalog with the seed script's load-test generator, then drives the app
+through httpx's ASGI transport (no network, no uvicorn) and records throughput and p50/p95/p99 latency for:
+    active_page         GET /items/active?limit=50 with rotating filters and sorts, response cache off
+    active_page_cached  the same page requested repeatedly, served from the catalog cache
+    login               POST /login (dominated by bcrypt)
+    create_item         POST /items
+    mark_sold           PUT /items/{id}/mark-sold
+    delete_item         DELETE /items/{id}
+
+Results are written as JSON. Pass --compare with an earlier results file to flag regressions; the exit
+status is 1 if any scenario got slower (p95) or lower-throughput than the threshold allows.
+
+Usage:
+    python -m backend.benchmarks.api [--sizes 1000 100000 1000000] [--output results.json] [--compare baseline.json]
+    python -m backend.benchmarks.api --current results.json --compare baseline.json   # compare without running
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Importing the app needs these; each catalog gets its own database file and engines
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+# A log line per request (or per slow statement, plus its EXPLAIN) would drown the results table and add
+# its own overhead to every timing
+os.environ["REQUEST_LOG"] = "false"
+os.environ["SLOW_QUERY_MS"] = "-1"
+# Otherwise every timed write schedules a full catalog rebuild plus gzip and brotli on the same CPU, published
+# into the dev server's snapshot directory; unfiltered /items/active isn't one of the scenarios anyway
+os.environ["CATALOG_SNAPSHOT"] = "false"
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+import backend.database
+from backend.cache import catalog_cache, principal_cache
+from backend.database import configure_sqlite, pool_options, to_async_url
+from backend.main import app
+from backend.scripts.seed_db import LOAD_TEST_EMAIL, LOAD_TEST_PASSWORD, create_load_test_items, create_load_test_users
+from backend.search import initialize_search_index
+from backend.security import password_hash_pool
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+CATEGORIES = ["school", "apparel", "living", "services", "tickets"]
+SORTS = ["newest", "price_asc", "price_desc", "title"]
+# Metrics compared against a baseline, and whether a higher value is better
+COMPARED_METRICS = {"p95_ms": False, "throughput_rps": True}
+
+
+def build_catalog(db_dir: Path, size: int, users: int, seed: int, workers: int | None) -> str:
+    """Create (or top up) the catalog database for one size and return its URL"""
+    url = f"sqlite:///{db_dir / f'catalog_{size}.db'}"
+    engine = create_engine(url, **pool_options(url))
+    configure_sqlite(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seller_ids = create_load_test_users(session, users, workers)
+        create_load_test_items(session, size, seller_ids, seed)
+    initialize_search_index(engine)
+    engine.dispose()
+    return url
+
+
+def use_database(url: str):
+    """Point the app's engines at the given database (same effect as starting it with DATABASE_URL=url)"""
+    async_engine = create_async_engine(to_async_url(url), **pool_options(url, for_async=True))
+    configure_sqlite(async_engine.sync_engine)
+    backend.database.async_engine = async_engine
+    backend.database.async_read_engine = async_engine
+    catalog_cache.invalidate()
+    catalog_cache.clear()
+    principal_cache.clear()
+    return async_engine
+
+
+def summarize(latencies: list[float], wall_seconds: float) -> dict:
+    """Throughput and latency percentiles (in milliseconds) for one scenario"""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall_seconds,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+async def run_scenario(count: int, concurrency: int, send) -> tuple[dict, list]:
+    """Call `send(i)` for i in range(count) with at most `concurrency` in flight; returns the summary and responses"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, responses = [], [None] * count
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}: {response.text}")
+            responses[i] = response
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return summarize(latencies, time.perf_counter() - started), responses
+
+
+async def benchmark_catalog(url: str, args) -> dict:
+    """Run every scenario against the catalog database at `url`"""
+    async_engine = use_database(url)
+    try:
+        return await run_scenarios(args)
+    finally:
+        await async_engine.dispose()  # Pooled aiosqlite connections must be closed on the loop that opened them
+
+
+async def run_scenarios(args) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        page_params = list(itertools.product([None, *CATEGORIES], SORTS))
+
+        def active_page(i: int):
+            category, sort = page_params[i % len(page_params)]
+            params = {"limit": 50, "sort": sort, **({"category": category} if category else {})}
+            return client.get("/items/active", params=params)
+
+        max_entries = catalog_cache.max_entries
+        catalog_cache.max_entries = 0  # Every set() is evicted immediately, so each request hits the database
+        try:
+            results["active_page"], _ = await run_scenario(args.requests, args.concurrency, active_page)
+        finally:
+            catalog_cache.max_entries = max_entries
+
+        await client.get("/items/active", params={"limit": 50})  # Warm the cache entry
+        results["active_page_cached"], _ = await run_scenario(
+            args.requests, args.concurrency, lambda i: client.get("/items/active", params={"limit": 50})
+        )
+
+        credentials = {"username": LOAD_TEST_EMAIL.format(n=1), "password": LOAD_TEST_PASSWORD.format(n=1)}
+        results["login"], responses = await run_scenario(
+            args.login_requests, args.concurrency, lambda i: client.post("/login", data=credentials)
+        )
+        headers = {"Authorization": f"Bearer {responses[0].json()['access_token']}"}
+
+        results["create_item"], responses = await run_scenario(args.requests, args.concurrency, lambda i: client.post(
+            "/items", json={"title": f"Benchmark Listing {i}", "price": 10.0 + i % 90, "category": CATEGORIES[i % 5]},
+            headers=headers,
+        ))
+        item_ids = [response.json()["id"] for response in responses]
+        results["mark_sold"], _ = await run_scenario(
+            args.requests, args.concurrency, lambda i: client.put(f"/items/{item_ids[i]}/mark-sold", headers=headers)
+        )
+        results["delete_item"], _ = await run_scenario(
+            args.requests, args.concurrency, lambda i: client.delete(f"/items/{item_ids[i]}", headers=headers)
+        )
+    return results
+
+
+def run(args) -> dict:
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = Path(args.db_dir) if args.db_dir else Path(tmp)
+        db_dir.mkdir(parents=True, exist_ok=True)
+        for size in args.sizes:
+            print(f"\n== {size:,} items ==")
+            started = time.perf_counter()
+            url = build_catalog(db_dir, size, args.users, args.seed, args.workers)
+            print(f"Catalog ready in {time.perf_counter() - started:.1f}s")
+            results = asyncio.run(benchmark_catalog(url, args))
+            report["results"][str(size)] = results
+            print_results(results)
+    password_hash_pool.shutdown()
+    return report
+
+
+def print_results(results: dict):
+    print(f"  {'scenario':20} | {'req/s':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print("  " + "-" * 64)
+    for scenario, stats in results.items():
+        print(
+            f"  {scenario:20} | {stats['throughput_rps']:9.1f} | {stats['p50_ms']:8.2f}"
+            f" | {stats['p95_ms']:8.2f} | {stats['p99_ms']:8.2f}"
+        )
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Human-readable regressions of `current` against `baseline`; empty when there are none"""
+    regressions = []
+    for size, scenarios in current["results"].items():
+        for scenario, stats in scenarios.items():
+            base = baseline.get("results", {}).get(size, {}).get(scenario)
+            if base is None:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                change = (stats[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(
+                        f"{size} items / {scenario}: {metric} {base[metric]:.2f} -> {stats[metric]:.2f} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes (default 1000 100000 1000000)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (default 200)")
+    parser.add_argument("--login-requests", type=int, default=20, help="Requests for the bcrypt-bound login scenario (default 20)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once (default 8)")
+    parser.add_argument("--users", type=int, default=20, help="Sellers in each catalog (default 20)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for the generated catalog (default 42)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to hash seed passwords (default: CPU count)")
+    parser.add_argument("--db-dir", help="Keep catalog databases here so later runs reuse them (default: a temp dir)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write results (default benchmark_results.json)")
+    parser.add_argument("--current", help="Compare this results file instead of running the benchmark")
+    parser.add_argument("--compare", help="Baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown before flagging (default 0.2)")
+    args = parser.parse_args()
+
+    if args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        current = run(args)
+        Path(args.output).write_text(json.dumps(current, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(current, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.compare} (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Microbenchmark for item payload serialization.
+
+Compares the old path (hand-built dicts through FastAPI's jsonable_encoder and json.dumps)
+with the current one (serialize_item dicts encoded by orjson), per 10k items.
+
+Usage: python -m backend.benchmarks.serialization [--items N] [--repeat R]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Importing the items routes needs these; the benchmark never touches the database
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from fastapi.encoders import jsonable_encoder
+from backend.models import ItemPublic
+from backend.routes.items import dump_json, serialize_item
+
+# Stand-in for a projection row of ITEM_COLUMNS plus seller_email
+ItemRow = namedtuple(
+    "ItemRow",
+    ["id", "title", "price", "seller_id", "category", "description", "image", "image_hash", "is_active", "seller_email"],
+)
+
+
+def make_rows(count: int) -> list[ItemRow]:
+    return [
+        ItemRow(
+            id=i,
+            title=f"Calculus Textbook — Seed #{i}",
+            price=round(10 + (i % 900) / 10, 2),
+            seller_id=i % 50,
+            category=("school", "apparel", "living", "services", "tickets")[i % 5],
+            description="Calculus Textbook for school category. High quality and great condition!",
+            image="https://images.unsplash.com/photo-1456513080510-7bf3a84b82f8?w=400",
+            image_hash=None,
+            is_active=True,
+            seller_email=f"user{i % 50}@ufl.edu",
+        )
+        for i in range(count)
+    ]
+
+
+def encode_before(rows: list[ItemRow]) -> bytes:
+    # What FastAPI did for a returned list of dicts: jsonable_encoder, then JSONResponse's json.dumps
+    items = [serialize_item(row, row.seller_email) for row in rows]
+    return json.dumps(
+        jsonable_encoder(items), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encode_pydantic(rows: list[ItemRow]) -> bytes:
+    # Validating every row into the ItemPublic model, for reference
+    items = [ItemPublic.model_validate(serialize_item(row, row.seller_email)) for row in rows]
+    return json.dumps([item.model_dump() for item in items], separators=(",", ":")).encode("utf-8")
+
+
+def encode_after(rows: list[ItemRow]) -> bytes:
+    return dump_json([serialize_item(row, row.seller_email) for row in rows])
+
+
+def best_time(func, rows, repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000, help="Items per payload (default 10000)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per encoder; the best is reported (default 20)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.items)
+    assert json.loads(encode_before(rows)) == json.loads(encode_after(rows))  # Same payload either way
+
+    print(f"Serializing {args.items} items, best of {args.repeat} runs")
+    print("-" * 60)
+    baseline = None
+    for name, func in [
+        ("jsonable_encoder + json.dumps (before)", encode_before),
+        ("ItemPublic models + json.dumps", encode_pydantic),
+        ("serialize_item + orjson (after)", encode_after),
+    ]:
+        seconds = best_time(func, rows, args.repeat)
+        baseline = baseline or seconds
+        per_10k_ms = seconds * 1000 * 10_000 / args.items
+        print(f"  {name:40} | {per_10k_ms:8.2f} ms / 10k items | {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Mixed read/write throughput benchmark for the SQLite production profile.
+
+Runs the same multi-threaded workload (catalog page reads plus item inserts) against a fresh
+SQLite file twice: once with SQLite's defaults and once with the pragmas from configure_sqlite().
+
+Usage: python -m backend.benchmarks.sqlite_profile [--items N] [--threads T] [--seconds S] [--write-ratio W]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Importing backend.database needs these; the benchmark builds its own engines
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, create_engine
+from backend.database import configure_sqlite, pool_options
+from backend.models import Item, User
+
+CATEGORIES = ["school", "apparel", "living", "services", "tickets"]
+
+
+def build_engine(path: Path, profile: bool):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **pool_options(url))
+    if profile:
+        configure_sqlite(engine)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, item_count: int):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"username": "bench", "email": "bench@ufl.edu", "hashed_password": "x", "is_admin": False}])
+        conn.execute(insert(Item), [
+            {"title": f"Item {i}", "price": float(i % 500), "category": CATEGORIES[i % 5], "seller_id": 1, "is_active": True}
+            for i in range(item_count)
+        ])
+
+
+def worker(engine, deadline: float, write_ratio: float, seed_value: int, results: dict, lock: threading.Lock):
+    rng = random.Random(seed_value)
+    reads = writes = errors = 0
+    page = (
+        select(Item.id, Item.title, Item.price)
+        .where(Item.is_active, Item.category == "school")
+        .order_by(Item.price, Item.id)
+        .limit(50)
+    )
+    while time.perf_counter() < deadline:
+        try:
+            with engine.connect() as conn:
+                if rng.random() < write_ratio:
+                    conn.execute(insert(Item).values(
+                        title="New listing", price=rng.uniform(1, 500), category=rng.choice(CATEGORIES),
+                        seller_id=1, is_active=True,
+                    ))
+                    conn.commit()
+                    writes += 1
+                else:
+                    conn.execute(page.where(Item.price >= rng.uniform(0, 450))).all()
+                    reads += 1
+        except OperationalError:
+            errors += 1  # "database is locked" after the busy timeout ran out
+    with lock:
+        results["reads"] += reads
+        results["writes"] += writes
+        results["errors"] += errors
+
+
+def run(profile: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Path(tmp) / "bench.db", profile)
+        seed(engine, args.items)
+        results, lock = {"reads": 0, "writes": 0, "errors": 0}, threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=worker, args=(engine, deadline, args.write_ratio, n, results, lock))
+            for n in range(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20_000, help="Items seeded before the run (default 20000)")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent worker threads (default 8)")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each run (default 5)")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="Fraction of operations that insert (default 0.1)")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.seconds:g}s per run, {args.write_ratio:.0%} writes, {args.items} seeded items")
+    print("-" * 72)
+    for name, profile in [("SQLite defaults (before)", False), ("Production profile (after)", True)]:
+        results = run(profile, args)
+        total = results["reads"] + results["writes"]
+        print(
+            f"  {name:28} | {total / args.seconds:8.0f} ops/s | {results['reads'] / args.seconds:7.0f} reads/s"
+            f" | {results['writes'] / args.seconds:6.0f} writes/s | {results['errors']} lock errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
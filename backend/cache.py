@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+from dotenv import load_dotenv
+import hashlib
+import os
+import threading
+import time
+
+load_dotenv()
+CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get("CATALOG_CACHE_MAX_ENTRIES", "256"))
+CATALOG_CACHE_TTL_SECONDS = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+
+class CatalogCache:
+    """
+    In-process LRU + TTL cache for serialized catalog responses.
+
+    Entries are tied to a monotonic catalog version. Item writes call invalidate(), which bumps the
+    version and drops every entry, so readers never see a response built before the write.
+    The cache is per process: with several workers, a write only invalidates the worker that handled it
+    and the other workers catch up within the TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()  # Sync routes run in FastAPI's threadpool, so guard the shared dict
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]  # Expired
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: int):
+        """Store a value computed while the catalog was at `version`; dropped if a write happened meanwhile"""
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Least recently used
+                self.evictions += 1
+
+    def invalidate(self):
+        """Bump the catalog version and drop every cached response (call after each committed item write)"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache from a verified access token to the user it resolved to.
+
+    A hit skips both JWT signature verification and the user lookup. Entries expire at the token's own
+    `exp` or after `ttl_seconds`, whichever comes first; the TTL bounds how long other worker processes
+    can serve a principal after invalidate_user() was called in this one.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Keep a fixed-size digest rather than the raw bearer token in memory
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Any | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]  # Token or cache entry expired
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, principal: Any, token_expires_at: float):
+        """Cache a principal for a token whose signature and expiry were just verified"""
+        expires_at = min(token_expires_at, time.time() + self.ttl_seconds)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token for a user (call when the user is deleted or their is_admin flag changes)"""
+        with self._lock:
+            stale = [key for key, (_, principal) in self._entries.items() if principal.id == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL_SECONDS)
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from typing import Iterable, Literal
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, insert, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+import asyncio
+import logging
+import os
+
+import backend.database as database
+from backend.models import ItemChange, utc_now
+
+load_dotenv()
+CHANGES_RETENTION_SECONDS = float(os.environ.get("CHANGES_RETENTION_SECONDS", str(7 * 24 * 3600)))
+CHANGES_COMPACT_INTERVAL_SECONDS = float(os.environ.get("CHANGES_COMPACT_INTERVAL_SECONDS", "3600"))
+
+# Any constant works; it only has to be the same for every writer
+CHANGE_LOG_LOCK_ID = 0x6974656D  # "item"
+
+changes_logger = logging.getLogger("backend.changes")
+
+
+async def record_item_changes(session: AsyncSession, op: Literal["insert", "update", "delete"], item_ids: Iterable[int]):
+    """
+    Append one change per item to the log in the caller's transaction. Call it right before commit.
+
+    Readers page through the log by seq, so a seq must never become visible after a higher one. SQLite
+    has a single writer, so that holds already. PostgreSQL assigns sequence values before commit, so there
+    writers take a transaction-scoped advisory lock that is held only from here to their commit.
+    """
+    changed_at = utc_now()
+    rows = [{"item_id": item_id, "op": op, "changed_at": changed_at} for item_id in item_ids]
+    if not rows:
+        return
+    if session.bind.dialect.name == "postgresql":
+        await session.exec(text("SELECT pg_advisory_xact_lock(:lock_id)").bindparams(lock_id=CHANGE_LOG_LOCK_ID))
+    await session.exec(insert(ItemChange), params=rows)
+
+
+async def change_log_bounds(session: AsyncSession) -> tuple[int | None, int | None]:
+    """Oldest and newest seq still in the log (None, None when it's empty)"""
+    # Separate scalar subqueries so each of min and max is a single primary key seek
+    return (await session.exec(select(
+        select(func.min(ItemChange.seq)).scalar_subquery(),
+        select(func.max(ItemChange.seq)).scalar_subquery(),
+    ))).one()
+
+
+async def compact_item_changes(session: AsyncSession, retention_seconds: float = CHANGES_RETENTION_SECONDS) -> int:
+    """
+    Delete changes older than the retention period and return how many went.
+
+    Only a whole prefix of the log is deleted: everything up to the highest seq stamped before the cutoff.
+    changed_at is taken before a writer's lock, so it isn't ordered like seq, and deleting by time alone
+    could drop a change while keeping an earlier one, which readers' cursors would then skip silently.
+    The newest change is always kept, so the log's bounds still tell readers where it starts and ends.
+    Clients whose cursor falls before the oldest remaining change get 410 and reload the catalog.
+    """
+    boundary = (
+        select(func.max(ItemChange.seq))
+        .where(ItemChange.changed_at < utc_now() - timedelta(seconds=retention_seconds))
+        .scalar_subquery()
+    )
+    newest = select(func.max(ItemChange.seq)).scalar_subquery()
+    result = await session.exec(delete(ItemChange).where(ItemChange.seq <= boundary, ItemChange.seq < newest))
+    await session.commit()
+    return result.rowcount
+
+
+async def compact_periodically():
+    """Run compact_item_changes() every CHANGES_COMPACT_INTERVAL_SECONDS (started by the app's lifespan)"""
+    while True:
+        try:
+            async with AsyncSession(database.async_engine) as session:
+                removed = await compact_item_changes(session)
+            if removed:
+                changes_logger.info("Compacted %d item changes older than %ss", removed, CHANGES_RETENTION_SECONDS)
+        except Exception:
+            changes_logger.exception("Item change log compaction failed")
+        await asyncio.sleep(CHANGES_COMPACT_INTERVAL_SECONDS)
@@ -1,7 +1,16 @@
-from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 from backend.models import User, Item
+from backend.pool_metrics import instrumented_pool_class
+from backend.search import initialize_search_index
 import os
+import threading
+import time
 
 load_dotenv()  # Gets our DATABASE_URL without leaking private data
 
@@ -10,12 +19,179 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:  # Sanity check to ensure DB URL was found
     raise ValueError("DATABASE_URL was not found, verify .env file.")
 
-engine = create_engine(DATABASE_URL)  # Add second parameter "echo=True" to get debug info printed out
+# Async drivers used by the API for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    # Swaps the driver in a sync URL (e.g. postgresql:// or postgresql+psycopg2://) for its async counterpart
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(hide_password=False)
+
+
+# Connection pool presets per backend; each setting can be overridden with the matching DB_POOL_* variable
+POOL_PRESETS = {
+    # Server database: keep warm connections, drop ones the server or a proxy may have closed
+    "postgresql": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+    # Local file: connections are cheap and never go stale
+    "sqlite": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": -1, "pool_pre_ping": False},
+}
+POOL_ENV_VARS = {
+    "pool_size": ("DB_POOL_SIZE", int),
+    "max_overflow": ("DB_MAX_OVERFLOW", int),
+    "pool_timeout": ("DB_POOL_TIMEOUT", float),
+    "pool_recycle": ("DB_POOL_RECYCLE", int),
+    "pool_pre_ping": ("DB_POOL_PRE_PING", lambda value: value.lower() in ("1", "true", "yes")),
+}
+
+
+def pool_options(url: str, for_async: bool = False) -> dict:
+    # Engine keyword arguments for the URL's backend preset plus any DB_POOL_* overrides
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool for it
+    options = dict(POOL_PRESETS.get(parsed.get_backend_name(), POOL_PRESETS["postgresql"]))
+    for option, (env_var, parse) in POOL_ENV_VARS.items():
+        if env_var in os.environ:
+            options[option] = parse(os.environ[env_var])
+    options["poolclass"] = instrumented_pool_class(AsyncAdaptedQueuePool if for_async else QueuePool)
+    return options
+
+
+# SQLite production profile, applied to every new connection to an SQLite database file.
+# WAL lets readers run alongside the single writer instead of blocking on it, synchronous=NORMAL is
+# durable under WAL while fsyncing far less, and busy_timeout makes writers queue up rather than fail
+# immediately with "database is locked". Each value can be overridden with the matching SQLITE_* variable.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),  # Bytes of the file to memory-map
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", "-64000")),  # Negative = KiB, so about 64 MB per connection
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # "connect" event listener; works for both sqlite3 and the aiosqlite adapter, which exposes a sync cursor
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def configure_sqlite(engine: Engine):
+    # Installs the production pragmas on a sync engine (pass async_engine.sync_engine for an async one)
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+
+
+# Sync engine for scripts (migrate, seed) and table creation
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))  # Add "echo=True" to get debug info printed out
+# Async engine for request handling, so DB round trips never block the event loop.
+# With aiosqlite every pooled connection runs on its own background thread, so SQLite connections are never shared between threads
+async_engine = create_async_engine(to_async_url(DATABASE_URL), **pool_options(DATABASE_URL, for_async=True))
+configure_sqlite(engine)
+configure_sqlite(async_engine.sync_engine)
+
+# Optional read replica. Read-only endpoints use it when set; otherwise every session goes to the primary
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
+if DATABASE_READ_URL:
+    async_read_engine = create_async_engine(to_async_url(DATABASE_READ_URL), **pool_options(DATABASE_READ_URL, for_async=True))
+    configure_sqlite(async_read_engine.sync_engine)
+else:
+    async_read_engine = async_engine
+
+# How long after a write its author keeps reading from the primary, covering the replica's replication lag
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+class PrimaryPins:
+    """
+    Read-your-writes tracking for replica routing.
+
+    pin() is called after a user commits a write; for the next `window_seconds` that user's reads go to
+    the primary, so they see their own change even if the replica hasn't caught up yet.
+    Pins are per process: with several workers, only the worker that handled the write knows about it.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.last_write_at = float("-inf")
+        self._pinned_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, username: str):
+        now = time.monotonic()
+        with self._lock:
+            self.last_write_at = now
+            self._pinned_until[username] = now + self.window_seconds
+            # Drop expired pins so the dict only holds recent writers
+            for expired in [name for name, until in self._pinned_until.items() if until <= now]:
+                del self._pinned_until[expired]
+
+    def is_pinned(self, username: str | None) -> bool:
+        if username is None or not self._pinned_until:
+            return False
+        return self._pinned_until.get(username, float("-inf")) > time.monotonic()
+
+    def has_active_pins(self) -> bool:
+        return bool(self._pinned_until)
+
+    def replica_may_lag(self) -> bool:
+        # True shortly after any write, when replica reads may still be missing it
+        return time.monotonic() - self.last_write_at < self.window_seconds
+
+    def clear(self):
+        with self._lock:
+            self._pinned_until.clear()
+            self.last_write_at = float("-inf")
+
+
+primary_pins = PrimaryPins(READ_YOUR_WRITES_SECONDS)
+
+
+def pool_stats(engine) -> dict:
+    # Live pool state plus checkout wait metrics for a sync or async engine
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"pool_class": type(pool).__name__, "status": pool.status()}
+    return metrics.snapshot(pool)
+
+
+def add_missing_columns(engine: Engine, table):
+    # create_all() never alters existing tables; add nullable columns introduced since the table was created
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
 
 def initialize_db():
     SQLModel.metadata.create_all(engine)  # Creates tables in the database based on "table=True" flag
+    add_missing_columns(engine, Item.__table__)
+    # create_all() skips tables that already exist, so add any indexes that were introduced after the table was created
+    for index in Item.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    initialize_search_index(engine)  # Full-text index used by /items/search
+
 
 # Ensures a new session is created for each request and closed when the request is done
-def get_session():
-    with Session(engine) as session:
-        yield session  # With yield --> Transaction safe session to the database, allows code to run and closes db at the end even if there is an error
\ No newline at end of file
+async def get_session():
+    # expire_on_commit=False keeps loaded attributes usable after commit, since async sessions can't lazy-load them
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session  # With yield --> Transaction safe session to the database, allows code to run and closes db at the end even if there is an error
+
+
+def open_read_session(use_primary: bool = False) -> AsyncSession:
+    # Session for read-only work: the replica when one is configured, unless the caller must see the primary
+    read_engine = async_engine if use_primary else async_read_engine
+    session = AsyncSession(read_engine, expire_on_commit=False)
+    session.info["replica"] = read_engine is not async_engine  # Lets callers avoid caching possibly-lagging results
+    return session
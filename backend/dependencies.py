@@ -1,20 +1,54 @@
 from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from sqlmodel import Session, select
+from pydantic import ValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
 
-from backend.database import get_session
-from backend.models import User
+from backend.cache import principal_cache
+from backend.database import get_session, open_read_session, primary_pins
+from backend.models import User, UserPublic
 from backend.security import SECRET_KEY, ALGORITHM
+from backend.timing import timed
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")  # Tells FastAPI that the frontend website can get a token by sending a POST request to /login
 
+
+def get_request_username(request: Request) -> str | None:
+    # Username from a valid bearer token on the request, if any (no DB lookup)
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except InvalidTokenError:
+        return None
+
+
+# Session for read-only endpoints: uses the read replica when DATABASE_READ_URL is set,
+# except for users who wrote recently, who stay on the primary so they see their own changes
+async def get_read_session(request: Request):
+    use_primary = primary_pins.has_active_pins() and primary_pins.is_pinned(get_request_username(request))
+    async with open_read_session(use_primary) as session:
+        yield session
+
+
 async def get_current_user(
         token: Annotated[str, Depends(oauth2_scheme)],
-        session: Session = Depends(get_session)
-) -> User:
+        session: AsyncSession = Depends(get_read_session)
+) -> UserPublic:
+    with timed("auth"):
+        return await resolve_principal(token, session)
+
+
+async def resolve_principal(token: str, session: AsyncSession) -> UserPublic:
+    # A token seen recently resolves straight to its principal: no signature check and no DB lookup
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,7 +65,43 @@ async def get_current_user(
     except InvalidTokenError:
         raise credentials_exception
 
-    user = session.exec(select(User).where(User.username == username)).first()
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    if "uid" in payload:
+        # Self-contained token: the signed claims are the principal. Its admin flag may predate a demotion, so
+        # admin-only decisions go through confirm_admin()
+        try:
+            principal = UserPublic(id=payload["uid"], username=username, email=payload["email"], is_admin=payload["adm"])
+        except (KeyError, ValidationError):
+            raise credentials_exception
+    else:
+        user = (await session.exec(select(User).where(User.username == username))).first()
+        if user is None:
+            raise credentials_exception
+
+        # Routes get a plain snapshot of the user rather than the ORM object, so it can be shared across requests
+        principal = UserPublic(id=user.id, username=user.username, email=user.email, is_admin=user.is_admin)
+
+    if "exp" in payload:  # Only tokens with an expiry are cached, so every entry has a hard deadline
+        principal_cache.set(token, principal, token_expires_at=payload["exp"])
+    return principal
+
+
+async def confirm_admin(current_user: UserPublic, session: AsyncSession) -> bool:
+    # Whether the user is an admin according to the database right now. Token claims and cached principals can
+    # predate a demotion or deletion, so they're never trusted for admin rights; owner checks don't need this
+    if not current_user.is_admin:
+        return False  # A stale False only denies; the user gets admin rights with a fresh token
+    user = await session.get(User, current_user.id)
+    return user is not None and user.is_admin
+
+
+async def get_current_admin(
+        current_user: UserPublic = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session)
+) -> UserPublic:
+    # Same as get_current_user, but only lets admins through
+    if not await confirm_admin(current_user, session):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
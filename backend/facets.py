@@ -0,0 +1,158 @@
+from time import monotonic
+from typing import Iterable
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import os
+import threading
+
+from backend.models import Item
+
+load_dotenv()
+FACETS_RECONCILE_SECONDS = float(os.environ.get("FACETS_RECONCILE_SECONDS", "60"))
+
+
+class FacetCounts:
+    """
+    Active item count and price range per category, kept in memory and updated by each item write.
+
+    Writes apply their own deltas, so reads don't scan the catalog. Removing an item priced at a category's
+    min or max leaves that range unknown; it is re-read with two index seeks on the next read. Every
+    `reconcile_seconds` a full GROUP BY recount replaces the counts. That recount also picks up writes
+    made by other workers or scripts, which this process never sees, so they show up within that interval.
+    """
+
+    def __init__(self, reconcile_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+        self.version = 0  # Bumped by every delta; a recount that raced with one is not applied
+        self.recounts = 0
+        self.corrections = 0  # Categories whose count a recount had to fix
+        self._facets: dict[str, list] = {}  # category -> [count, min_price, max_price]
+        self._stale_bounds: set[str] = set()
+        self._reconciled_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def add(self, items: Iterable[tuple[str, float]]):
+        """Count newly active items, given as (category, price)"""
+        with self._lock:
+            self.version += 1
+            for category, price in items:
+                facet = self._facets.get(category)
+                if facet is None:
+                    self._facets[category] = [1, price, price]
+                    continue
+                facet[0] += 1
+                if category not in self._stale_bounds:
+                    facet[1] = min(facet[1], price)
+                    facet[2] = max(facet[2], price)
+
+    def remove(self, items: Iterable[tuple[str, float]]):
+        """Uncount items that were active and have been sold or deleted, given as (category, price)"""
+        with self._lock:
+            self.version += 1
+            for category, price in items:
+                facet = self._facets.get(category)
+                if facet is None:
+                    continue  # Never counted here; the next recount settles it
+                facet[0] -= 1
+                if facet[0] <= 0:
+                    del self._facets[category]
+                    self._stale_bounds.discard(category)
+                elif price <= facet[1] or price >= facet[2]:
+                    self._stale_bounds.add(category)  # The next min/max is unknown without asking the database
+
+    def reconcile_due(self) -> bool:
+        return monotonic() - self._reconciled_at >= self.reconcile_seconds
+
+    def stale_bounds(self) -> set[str]:
+        with self._lock:
+            return set(self._stale_bounds)
+
+    def apply_recount(self, rows: Iterable[tuple[str, int, float, float]], version: int) -> bool:
+        """Replace everything with a recount started at `version`; skipped if a write landed meanwhile"""
+        recounted = {category: [count, min_price, max_price] for category, count, min_price, max_price in rows}
+        with self._lock:
+            if version != self.version:
+                return False
+            if self.recounts:  # The first recount is the initial load, not a correction
+                self.corrections += sum(
+                    1 for category in recounted.keys() | self._facets.keys()
+                    if recounted.get(category, [0])[0] != self._facets.get(category, [0])[0]
+                )
+            self.recounts += 1
+            self._facets = recounted
+            self._stale_bounds.clear()
+            self._reconciled_at = monotonic()
+            return True
+
+    def apply_bounds(self, category: str, min_price: float | None, max_price: float | None, version: int):
+        with self._lock:
+            if version != self.version or category not in self._facets:
+                return
+            if min_price is None:  # Nothing active left in the category
+                del self._facets[category]
+            else:
+                self._facets[category][1:] = [min_price, max_price]
+            self._stale_bounds.discard(category)
+
+    def facets(self) -> dict:
+        with self._lock:
+            return {
+                category: {"count": count, "min_price": min_price, "max_price": max_price}
+                for category, (count, min_price, max_price) in sorted(self._facets.items())
+            }
+
+    def clear(self):
+        """Forget everything, so the next read recounts"""
+        with self._lock:
+            self.version += 1
+            self._facets.clear()
+            self._stale_bounds.clear()
+            self._reconciled_at = float("-inf")
+            self.recounts = self.corrections = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "categories": len(self._facets),
+                "stale_bounds": sorted(self._stale_bounds),
+                "reconcile_seconds": self.reconcile_seconds,
+                "seconds_since_reconcile": round(monotonic() - self._reconciled_at, 1)
+                if self._reconciled_at != float("-inf") else None,
+                "recounts": self.recounts,
+                "corrections": self.corrections,
+            }
+
+
+facet_counts = FacetCounts(FACETS_RECONCILE_SECONDS)
+
+
+async def current_facets(session: AsyncSession) -> dict:
+    """Per-category facets, recounting or refreshing price ranges first where needed. `session` should read the primary."""
+    if facet_counts.reconcile_due():
+        version = facet_counts.version  # Read before querying so a concurrent write discards this result
+        # One pass over the (is_active, category, price, id) index
+        rows = (await session.exec(
+            select(Item.category, func.count(), func.min(Item.price), func.max(Item.price))
+            .where(Item.is_active)
+            .group_by(Item.category)
+        )).all()
+        if not facet_counts.apply_recount(rows, version):
+            # A write landed mid-recount; this result is still exact as of the query, so answer with it
+            return {
+                category: {"count": count, "min_price": min_price, "max_price": max_price}
+                for category, count, min_price, max_price in sorted(rows)
+            }
+
+    for category in facet_counts.stale_bounds():
+        version = facet_counts.version
+        conditions = (Item.is_active, Item.category == category)
+        # Separate scalar subqueries so each of min and max is a single index seek
+        min_price, max_price = (await session.exec(select(
+            select(func.min(Item.price)).where(*conditions).scalar_subquery(),
+            select(func.max(Item.price)).where(*conditions).scalar_subquery(),
+        ))).one()
+        facet_counts.apply_bounds(category, min_price, max_price, version)
+
+    return facet_counts.facets()
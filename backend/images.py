@@ -0,0 +1,202 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterable
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+import anyio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+load_dotenv()
+IMAGE_STORAGE_DIR = Path(os.environ.get("IMAGE_STORAGE_DIR", Path(__file__).parent / "media"))
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "1"))
+
+# Formats accepted for upload -> file extension of the stored original
+IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+# Variant name -> bounding box; variants keep the aspect ratio and are stored as WebP
+VARIANTS = {"thumb": (160, 160), "card": (480, 480)}
+VARIANT_QUALITY = 80
+# An original whose variants failed is retried after IMAGE_RETRY_SECONDS, doubling after each failure, and left
+# alone after IMAGE_MAX_ATTEMPTS. Without this, a file that verifies but won't decode (truncated, or over Pillow's
+# decompression-bomb limit) would be decoded again on every variant request
+IMAGE_RETRY_SECONDS = 60
+IMAGE_MAX_ATTEMPTS = 3
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def original_path(image_hash: str, extension: str, root: Path | None = None) -> Path:
+    # Fanned out by the first two hex digits so no directory grows to millions of entries
+    return (root or IMAGE_STORAGE_DIR) / "originals" / image_hash[:2] / f"{image_hash}.{extension}"
+
+
+def variant_path(image_hash: str, variant: str, root: Path | None = None) -> Path:
+    return (root or IMAGE_STORAGE_DIR) / "variants" / image_hash[:2] / f"{image_hash}-{variant}.webp"
+
+
+def find_original(image_hash: str) -> Path | None:
+    """Stored original for a hash, whichever format it was uploaded in"""
+    for extension in IMAGE_FORMATS.values():
+        path = original_path(image_hash, extension)
+        if path.is_file():
+            return path
+    return None
+
+
+def image_format(path: Path) -> str:
+    """Extension for an uploaded file, or UnsupportedImage if Pillow can't read it as an accepted format"""
+    try:
+        with Image.open(path) as image:
+            extension = IMAGE_FORMATS.get(image.format)
+            image.verify()  # Walks the file's structure without decoding all the pixels
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise UnsupportedImage()
+    if extension is None:
+        raise UnsupportedImage()
+    return extension
+
+
+async def store_upload(chunks: AsyncIterable[bytes], max_bytes: int) -> tuple[str, Path]:
+    """
+    Write an upload to content-addressed storage as it arrives, hashing it on the way.
+
+    Only one chunk is held in memory at a time. Returns the SHA-256 hex digest and the stored original;
+    identical uploads share one file. Raises ImageTooLarge past `max_bytes` and UnsupportedImage if it isn't an image.
+    """
+    tmp_dir = IMAGE_STORAGE_DIR / "tmp"
+    await anyio.to_thread.run_sync(lambda: tmp_dir.mkdir(parents=True, exist_ok=True))
+    tmp_path = tmp_dir / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLarge()
+                digest.update(chunk)
+                await anyio.to_thread.run_sync(file.write, chunk)
+        extension = await anyio.to_thread.run_sync(image_format, tmp_path)
+        image_hash = digest.hexdigest()
+        path = original_path(image_hash, extension)
+        # Rename within one filesystem is atomic, so readers never see a half-written original
+        await anyio.to_thread.run_sync(lambda: path.parent.mkdir(parents=True, exist_ok=True))
+        await anyio.to_thread.run_sync(os.replace, tmp_path, path)
+        return image_hash, path
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def make_variants(source: str, image_hash: str, root: str) -> list[str]:
+    """Resize an original into every VARIANTS size (runs in a worker process)"""
+    created = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)  # Phone photos are often stored sideways with a rotation tag
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        for variant, size in VARIANTS.items():
+            path = variant_path(image_hash, variant, Path(root))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            resized = image.copy()
+            resized.thumbnail(size, Image.Resampling.LANCZOS)
+            tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            resized.save(tmp_path, "WEBP", quality=VARIANT_QUALITY, method=4)
+            os.replace(tmp_path, path)
+            created.append(variant)
+    return created
+
+
+class ImageProcessor:
+    """
+    Generates image variants on a dedicated process pool, off the request path.
+
+    Resizing is CPU-bound and holds the GIL, so it runs in `workers` separate processes; uploads return as soon
+    as the original is stored and the variant URLs fall back to the original until their files exist.
+    Each hash is processed at most once at a time, and hashes that failed are only retried with backoff.
+    """
+
+    def __init__(self, workers: int, retry_seconds: float = IMAGE_RETRY_SECONDS, max_attempts: int = IMAGE_MAX_ATTEMPTS):
+        self.workers = workers
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.completed = 0
+        self.failed = 0
+        self._pending: dict[str, Future] = {}
+        self._failures: dict[str, tuple[int, float]] = {}  # hash -> (failed attempts, monotonic time of the last failure)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # Notified as jobs finish, after their outcome is recorded
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn rather than fork: the server process is multi-threaded, which fork doesn't handle safely
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, image_hash: str, source: Path):
+        """Queue variant generation for an original without waiting for it"""
+        with self._lock:
+            if image_hash in self._pending:
+                return
+            attempts, failed_at = self._failures.get(image_hash, (0, float("-inf")))
+            if attempts >= self.max_attempts or time.monotonic() < failed_at + self.retry_seconds * 2 ** (attempts - 1):
+                return  # Failed recently or too often; the variant URLs keep serving the original
+            future = self._get_executor().submit(make_variants, str(source), image_hash, str(IMAGE_STORAGE_DIR))
+            self._pending[image_hash] = future
+        future.add_done_callback(lambda done: self._finished(image_hash, done))
+
+    def _finished(self, image_hash: str, future: Future):
+        with self._lock:
+            self._pending.pop(image_hash, None)
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                attempts = self._failures.get(image_hash, (0, 0.0))[0] + 1
+                self._failures[image_hash] = (attempts, time.monotonic())
+            else:
+                self.completed += 1
+                self._failures.pop(image_hash, None)
+            self._idle.notify_all()
+
+    def wait(self, timeout: float | None = None):
+        """Block until every queued job has finished and been recorded (for tests and scripts)"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "completed": self.completed,
+                "failed": self.failed,
+                "failing_hashes": len(self._failures),
+                "abandoned_hashes": sum(1 for attempts, _ in self._failures.values() if attempts >= self.max_attempts),
+            }
+
+    def forget_failures(self):
+        """Allow every failed hash to be retried right away"""
+        with self._lock:
+            self._failures.clear()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+image_processor = ImageProcessor(IMAGE_WORKERS)
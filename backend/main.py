@@ -1,12 +1,20 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
+from backend.changes import compact_periodically
 from backend.database import initialize_db
 from backend.routes.auth import auth_router
 from backend.dependencies import get_current_user
-from backend.models import User
-from backend.routes.items import items_router
+from backend.models import UserPublic
+from backend.security import password_hash_pool
+from backend.routes.items import items_router, prepare_catalog_snapshot
+from backend.routes.images import images_router
+from backend.images import image_processor
+from backend.routes.internal import internal_router
+from backend.timing import TimingMiddleware
+from backend.metrics import MetricsMiddleware, mark_process_dead, metrics_router
 
 # Transforms a generator into an asynchronous context manager.
 # Handles the functionality of 'with', which allows setup code to run before the block and cleanup code to run after, even if an error occurred.
@@ -14,7 +22,13 @@ from backend.routes.items import items_router
 async def lifespan(app: FastAPI):
     initialize_db()
     print("Database initialized and user table created!")
+    prepare_catalog_snapshot()
+    compaction = asyncio.create_task(compact_periodically())
     yield  # Anything after yield runs when the app shuts down
+    compaction.cancel()
+    password_hash_pool.shutdown()
+    image_processor.shutdown()
+    mark_process_dead()
 app = FastAPI(lifespan=lifespan)
 
 # --- CORS CONFIG (Connecting to Frontend) ---
@@ -28,17 +42,23 @@ app.add_middleware(
     allow_credentials=True,  # Cookies/auth headers
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Changes-Since"],  # Lets the browser read the cursor and change position on /items/active
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TimingMiddleware)  # Added last so it's outermost and its timings include the other middleware
 
 app.include_router(auth_router)
 app.include_router(items_router)
+app.include_router(images_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Gator Market API!"}
 
 @app.get("/secure-data")
-def read_secure_data(current_user: User = Depends(get_current_user)):
+def read_secure_data(current_user: UserPublic = Depends(get_current_user)):
     return {
         "message": f"Success! You are authenticated as {current_user.username}",
         "email": current_user.email,
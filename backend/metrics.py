@@ -0,0 +1,138 @@
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from fastapi import APIRouter, Response
+from time import perf_counter, monotonic
+from typing import Any
+from dotenv import load_dotenv
+import os
+
+import backend.database as database
+from backend.cache import catalog_cache, principal_cache
+from backend.security import password_hash_pool
+
+load_dotenv()
+# Set PROMETHEUS_MULTIPROC_DIR (to an empty directory, before the workers start) when running several uvicorn workers;
+# each worker then writes its samples to memory-mapped files there and /metrics on any worker reports the sum
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+METRICS_REFRESH_SECONDS = float(os.environ.get("METRICS_REFRESH_SECONDS", "5"))
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+
+# Component state. Gauges are summed over live workers; counters keep dead workers' totals, like the request counters
+DB_POOL_SIZE = Gauge("db_pool_size", "API connection pool size", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "API connections in use", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "API connections open beyond the pool size", multiprocess_mode="livesum")
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts", "Connection checkouts that timed out waiting for the pool")
+BCRYPT_IN_FLIGHT = Gauge("bcrypt_in_flight", "Password hashing jobs running or queued", multiprocess_mode="livesum")
+BCRYPT_QUEUE_DEPTH = Gauge("bcrypt_queue_depth", "Password hashing jobs waiting for a worker", multiprocess_mode="livesum")
+BCRYPT_COMPLETED = Counter("bcrypt_jobs_completed", "Password hashing jobs finished")
+BCRYPT_REJECTED = Counter("bcrypt_jobs_rejected", "Password hashing jobs turned away with 503")
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by an in-process cache", ["cache"], multiprocess_mode="livesum")
+CACHE_HITS = Counter("cache_hits", "Cache lookups answered from the cache", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "Cache lookups that missed", ["cache"])
+
+# Labelled children by label values; a dict lookup is much cheaper than .labels(), which takes a lock on every call
+_request_counters: dict[tuple[str, str, str], Any] = {}
+_duration_histograms: dict[tuple[str, str], Any] = {}
+# Component counters are cumulative numbers owned by their components; only the increase since the last refresh is exported
+_exported_totals: dict[Any, float] = {}
+_last_refresh = float("-inf")
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    counter = _request_counters.get((method, route, status))
+    if counter is None:
+        counter = _request_counters[(method, route, status)] = REQUESTS.labels(method, route, str(status))
+    counter.inc()
+    histogram = _duration_histograms.get((method, route))
+    if histogram is None:
+        histogram = _duration_histograms[(method, route)] = REQUEST_DURATION.labels(method, route)
+    histogram.observe(seconds)
+
+
+def _export_total(counter, total: float):
+    previous = _exported_totals.get(counter, 0.0)
+    # A smaller total means the component reset its counters (e.g. cache.clear()); count from zero again
+    counter.inc(total - previous if total >= previous else total)
+    _exported_totals[counter] = total
+
+
+def refresh_process_metrics():
+    """Copy this process's pool, bcrypt and cache state into the Prometheus metrics"""
+    global _last_refresh
+    _last_refresh = monotonic()
+
+    pool = database.pool_stats(database.async_engine)
+    DB_POOL_SIZE.set(pool.get("size", 0))
+    DB_POOL_CHECKED_OUT.set(pool.get("checked_out", 0))
+    DB_POOL_OVERFLOW.set(pool.get("overflow", 0))
+    _export_total(DB_POOL_TIMEOUTS, pool.get("timeouts", 0))
+
+    bcrypt = password_hash_pool.stats()
+    BCRYPT_IN_FLIGHT.set(bcrypt["in_flight"])
+    BCRYPT_QUEUE_DEPTH.set(bcrypt["queue_depth"])
+    _export_total(BCRYPT_COMPLETED, bcrypt["completed"])
+    _export_total(BCRYPT_REJECTED, bcrypt["rejected"])
+
+    for name, cache in (("catalog", catalog_cache), ("principal", principal_cache)):
+        stats = cache.stats()
+        CACHE_ENTRIES.labels(name).set(stats["entries"])
+        _export_total(CACHE_HITS.labels(name), stats["hits"])
+        _export_total(CACHE_MISSES.labels(name), stats["misses"])
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting requests by method, route template and status and timing them.
+    Every METRICS_REFRESH_SECONDS it also refreshes this worker's component metrics, so workers that
+    aren't the one being scraped still report current values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't create unbounded series
+            observe_request(scope["method"], getattr(route, "path", "unmatched"), status_code, perf_counter() - started)
+            if monotonic() - _last_refresh >= METRICS_REFRESH_SECONDS:
+                refresh_process_metrics()
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, pool, bcrypt and cache metrics (summed over workers in multiprocess mode)"""
+    # async so the refresh runs on the event loop, never concurrently with the middleware's
+    refresh_process_metrics()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the multiprocess files (call on shutdown)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,10 +1,29 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from pydantic import EmailStr, field_validator
 from typing import List
+from datetime import datetime, timezone
 import re
 
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 # --- Database Models ---
 class Item(SQLModel, table=True):
+    # Composite indexes backing the filtered/sorted keyset queries on /items/active.
+    # Each one ends in "id" so (sort value, id) can be used as a unique, seekable cursor.
+    __table_args__ = (
+        Index("ix_item_active_category_price_id", "is_active", "category", "price", "id"),
+        Index("ix_item_active_price_id", "is_active", "price", "id"),
+        Index("ix_item_active_title_id", "is_active", "title", "id"),
+        Index("ix_item_active_category_id", "is_active", "category", "id"),
+        # Filters used by the bulk moderation endpoints
+        Index("ix_item_seller_id", "seller_id"),
+        Index("ix_item_created_at", "created_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     title: str
     description: str | None = None
@@ -13,7 +32,21 @@ class Item(SQLModel, table=True):
     category: str
     is_active: bool = Field(default=True)
     image: str | None = None
+    image_hash: str | None = None  # SHA-256 of an uploaded image (see POST /items/{id}/image); None for external URLs
+    created_at: datetime | None = Field(default_factory=utc_now)  # None for items listed before the column existed
     seller: "User" = Relationship(back_populates="items")
+
+class ItemChange(SQLModel, table=True):
+    # Append-only log of item writes, read by GET /items/changes. AUTOINCREMENT keeps SQLite from reusing
+    # the seq of compacted-away rows, which would send clients holding an old cursor backwards
+    __tablename__ = "item_change"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: int | None = Field(default=None, primary_key=True)
+    item_id: int  # No foreign key: deletes are logged after the item is gone
+    op: str  # "insert", "update" or "delete"
+    changed_at: datetime = Field(default_factory=utc_now, index=True)
+
 class User(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     username: str = Field(index=True, unique=True)
@@ -56,6 +89,23 @@ class UserPublic(SQLModel):
     email: EmailStr
     is_admin: bool = False
 
+class SellerPublic(SQLModel):
+    # Seller details shown alongside a listing
+    email: str
+
+class ItemPublic(SQLModel):
+    # Defines the item data returned by every item endpoint
+    id: int
+    title: str
+    price: float
+    seller_id: int
+    category: str
+    description: str | None = None
+    image: str | None = None
+    image_hash: str | None = None  # Set for uploaded images; variants are at /images/{image_hash}/thumb and /card
+    is_active: bool
+    seller: SellerPublic | None = None
+
 class Token(SQLModel):
     # Structure of an authentication response for OAuth2 workflows.
     # Return a bearer token to user after successful login
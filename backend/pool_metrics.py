@@ -0,0 +1,92 @@
+from bisect import bisect_left
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+import threading
+import time
+
+# Upper bounds (in seconds) of the connection checkout latency histogram buckets
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; each bucket counts observations at or below its bound"""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is the +Inf bucket
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), self.counts):
+                running += bucket_count
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            return {
+                "count": self.count,
+                "sum_seconds": self.total,
+                "max_seconds": self.max,
+                "mean_seconds": self.total / self.count if self.count else 0.0,
+                "buckets": cumulative,
+            }
+
+
+class PoolMetrics:
+    """Checkout latency and timeout counters for one engine's connection pool"""
+
+    def __init__(self):
+        self.checkout_latency = LatencyHistogram(CHECKOUT_BUCKETS)
+        self.timeouts = 0
+
+    def snapshot(self, pool: Pool) -> dict:
+        stats = {"pool_class": type(pool).__name__, "timeouts": self.timeouts}
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),  # Negative while the pool hasn't opened all its connections yet
+                "max_overflow": pool.max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        stats["checkout_wait"] = self.checkout_latency.snapshot()
+        return stats
+
+
+def instrumented_pool_class(base: type[QueuePool]) -> type[QueuePool]:
+    """
+    Subclass of a queue pool that times every connection checkout, including time spent waiting
+    for a free connection (and the pre-ping, when enabled). Each call makes a new class with its own PoolMetrics,
+    reachable as engine.pool.metrics; a pool rebuilt by engine.dispose() is an instance of the same class,
+    so the metrics carry over. Only the pool's public constructor and connect() are relied on.
+    """
+
+    class InstrumentedPool(base):
+        metrics = PoolMetrics()
+
+        def __init__(self, *args, max_overflow: int = 10, **kwargs):
+            super().__init__(*args, max_overflow=max_overflow, **kwargs)
+            self.max_overflow = max_overflow  # QueuePool has no public accessor for it
+
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except PoolTimeoutError:
+                self.metrics.timeouts += 1
+                raise
+            finally:
+                self.metrics.checkout_latency.observe(time.perf_counter() - start)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
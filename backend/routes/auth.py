@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select, or_
+from sqlmodel import select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta
 
 from backend.models import User, UserCreate, UserPublic, Token
-from backend.database import get_session
+from backend.database import get_session, primary_pins
 from backend.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
+    PasswordHasherBusy,
+    SELF_CONTAINED_TOKENS,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -17,11 +20,21 @@ from backend.security import (
 auth_router = APIRouter(tags=["authentication"])
 
 
+def hashing_busy_exception() -> HTTPException:
+    # Returned when the bcrypt pool is saturated, so a login storm is shed instead of piling up
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+
 @auth_router.post("/signup", response_model=UserPublic)
-def signup(user_data: UserCreate, session: Session = Depends(get_session)):
-    user_exists = session.exec(
+async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_session)):
+    user_exists = (await session.exec(
         select(User).where((User.email == user_data.email) | (User.username == user_data.username))
-    ).first()  # Queries the database with a SQL wrapper (ORM) to check if the user already exists
+    )).first()  # Queries the database with a SQL wrapper (ORM) to check if the user already exists
 
     if user_exists:
         raise HTTPException(
@@ -30,7 +43,11 @@ def signup(user_data: UserCreate, session: Session = Depends(get_session)):
         )
 
     # User does not already exist, so hash their password and add the user's data into the database
-    hashed_pwd = get_password_hash(user_data.password)
+    # bcrypt is CPU-bound, so it runs on the dedicated hashing pool
+    try:
+        hashed_pwd = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy:
+        raise hashing_busy_exception()
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -38,24 +55,29 @@ def signup(user_data: UserCreate, session: Session = Depends(get_session)):
     )
 
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    primary_pins.pin(new_user.username)  # Their first authenticated requests must find the account even if the replica lags
 
     # Validates and converts object into the UserPublic Pydantic model, effectively stripping hashed_password
     return new_user
 
 @auth_router.post("/login")
-def login(
+async def login(
         # Pre-built Pydantic model that tells FastAPI to look for data sent in the requested body as standard HTML form data (application/x-www-form-urlencoded)
         # Specifically looks for username and password fields and parses the data
         form_data: OAuth2PasswordRequestForm = Depends(),
-        session: Session = Depends(get_session)
+        session: AsyncSession = Depends(get_session)
 ):
-    user = session.exec(
+    user = (await session.exec(
         select(User).where(or_(User.username == form_data.username, User.email == form_data.username))
-    ).first()  # Queries the database for the user with the given username
+    )).first()  # Queries the database for the user with the given username
+
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hashing_busy_exception()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -64,8 +86,10 @@ def login(
 
     # User is valid, so generate JSON Web Token to authorize them
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Self-contained tokens carry everything get_current_user needs, so later requests skip the user lookup
+    claims = {"uid": user.id, "email": user.email, "adm": user.is_admin} if SELF_CONTAINED_TOKENS else None
     access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
+        subject=user.username, expires_delta=access_token_expires, claims=claims
     )
 
     # Return token with user metadata (backward compatible)
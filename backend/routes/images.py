@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from pathlib import Path
+from typing import Literal
+import re
+
+from backend.images import MEDIA_TYPES, find_original, image_processor, variant_path
+from backend.routes.items import etag_matches
+
+images_router = APIRouter(tags=["images"])
+
+HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+# A hash names exactly one file forever, so browsers and CDNs may keep it for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Served in place of a variant that isn't generated yet; short so clients pick up the real variant soon
+FALLBACK_CACHE_CONTROL = "public, max-age=60"
+
+
+def image_response(request: Request, path: Path, etag: str, cache_control: str) -> Response:
+    """The file with caching headers, a 304 when the client's copy matches, or the requested byte range"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # FileResponse answers Range/If-Range requests with 206 on its own
+    return FileResponse(path, media_type=MEDIA_TYPES[path.suffix.lstrip(".")], headers=headers)
+
+
+def original_or_404(image_hash: str) -> Path:
+    path = find_original(image_hash) if HASH_PATTERN.fullmatch(image_hash) else None
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return path
+
+
+@images_router.get("/images/{image_hash}")
+def get_image(image_hash: str, request: Request):
+    """Uploaded image as stored, addressed by its SHA-256"""
+    return image_response(request, original_or_404(image_hash), f'"{image_hash}"', IMMUTABLE_CACHE_CONTROL)
+
+
+@images_router.get("/images/{image_hash}/{variant}")
+def get_image_variant(image_hash: str, variant: Literal["thumb", "card"], request: Request):
+    """Resized WebP variant of an uploaded image; the original is served until the variant has been generated"""
+    original = original_or_404(image_hash)
+    path = variant_path(image_hash, variant)
+    if path.is_file():
+        return image_response(request, path, f'"{image_hash}-{variant}"', IMMUTABLE_CACHE_CONTROL)
+    # Requeues jobs lost to a restart; no-op while one is pending or while a failed hash is backing off
+    image_processor.submit(image_hash, original)
+    return image_response(request, original, f'"{image_hash}"', FALLBACK_CACHE_CONTROL)
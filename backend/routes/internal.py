@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.cache import catalog_cache, principal_cache
+from backend.changes import compact_item_changes
+from backend.database import async_engine, get_session, pool_stats
+from backend.dependencies import get_current_admin
+from backend.facets import facet_counts
+from backend.images import image_processor
+from backend.routes.items import bulk_row_budget, catalog_snapshot
+from backend.security import password_hash_pool
+from backend.slow_queries import slow_query_log
+
+# Operational endpoints for sizing and debugging the running server. Admin only.
+internal_router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(get_current_admin)])
+
+
+@internal_router.get("/cache")
+def get_cache_stats():
+    """Catalog cache size, version and hit/miss/eviction counters"""
+    return catalog_cache.stats()
+
+
+@internal_router.get("/principal-cache")
+def get_principal_cache_stats():
+    """Verified-token cache size and hit/miss/eviction counters"""
+    return principal_cache.stats()
+
+
+@internal_router.get("/bcrypt")
+def get_bcrypt_stats():
+    """Password hashing pool size, in-flight jobs, queue depth and rejections"""
+    return password_hash_pool.stats()
+
+
+@internal_router.get("/db-pool")
+def get_db_pool_stats():
+    """API connection pool usage: checked out, overflow, timeouts and checkout wait histogram"""
+    return pool_stats(async_engine)
+
+
+@internal_router.get("/bulk")
+def get_bulk_stats():
+    """Rows currently being inserted by POST /items/bulk and how many batches were turned away"""
+    return bulk_row_budget.stats()
+
+
+@internal_router.get("/snapshot")
+def get_snapshot_stats():
+    """Catalog snapshot state: whether it's waiting for a rebuild, builds, failures and files served"""
+    return catalog_snapshot.stats()
+
+
+@internal_router.get("/facets")
+def get_facet_stats():
+    """Facet counter state: categories tracked, ranges awaiting a refresh, recounts and the corrections they made"""
+    return facet_counts.stats()
+
+
+@internal_router.get("/images")
+def get_image_stats():
+    """Image variant jobs queued or running, finished and failed"""
+    return image_processor.stats()
+
+
+@internal_router.get("/slow-queries")
+def get_slow_queries():
+    """Threshold, total count and the most recent slow statements (newest first) with their plans"""
+    return slow_query_log.stats()
+
+
+@internal_router.delete("/slow-queries")
+def clear_slow_queries():
+    """Empty the slow-query ring buffer"""
+    slow_query_log.clear()
+    return {"detail": "Slow-query log cleared"}
+
+
+@internal_router.post("/changes/compact")
+async def compact_changes(session: AsyncSession = Depends(get_session)):
+    """Drop item changes older than CHANGES_RETENTION_SECONDS now instead of waiting for the hourly run"""
+    return {"removed": await compact_item_changes(session)}
@@ -1,11 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from pydantic import BaseModel
-from backend.database import get_session
-from backend.models import Item, User
-from backend.dependencies import get_current_user
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import delete, func, insert, or_, tuple_, update
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Literal
+from datetime import datetime, timezone
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+import orjson
+from backend.cache import catalog_cache
+from backend.changes import change_log_bounds, record_item_changes
+from backend.database import get_session, open_read_session, primary_pins
+from backend.facets import current_facets, facet_counts
+from backend.images import IMAGE_MAX_BYTES, ImageTooLarge, UnsupportedImage, image_processor, store_upload
+from backend.models import Item, ItemChange, ItemPublic, User, UserPublic
+from backend.dependencies import confirm_admin, get_current_user, get_read_session
+from backend.snapshot import CATALOG_SNAPSHOT, CATALOG_SNAPSHOT_DEBOUNCE_SECONDS, CATALOG_SNAPSHOT_DIR, CatalogSnapshot
+from backend.timing import timed
+from backend.search import (
+    build_match_query, index_item, index_items, remove_item_from_index, remove_items_from_index, search_hits
+)
 
-items_router = APIRouter(tags=["items"])
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson, which encodes plain dicts and lists several times faster than json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return orjson.dumps(content)
+
+
+items_router = APIRouter(tags=["items"], default_response_class=OrjsonResponse)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_CHANGES_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"  # Pass back as ?cursor= to fetch the following page
+CHANGES_SINCE_HEADER = "X-Changes-Since"  # Change seq the /items/active body is current to; poll /items/changes from it
+STREAM_BATCH_SIZE = 1000  # Rows fetched from the database and written to the client per chunk
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "500"))  # Largest batch one POST /items/bulk may carry
+BULK_MAX_ROWS_IN_FLIGHT = int(os.environ.get("BULK_MAX_ROWS_IN_FLIGHT", "2000"))  # Rows all bulk requests may be inserting at once
+BULK_MAX_IDS = 10_000  # Ids per bulk mark-sold/delete request; stays under the drivers' bound-parameter limits
+
+# Sort key -> (column, descending). Every ordering is tie-broken by Item.id so cursors are unique
+SORT_COLUMNS = {
+    "title": (Item.title, False),
+    "price_asc": (Item.price, False),
+    "price_desc": (Item.price, True),
+    "newest": (Item.id, True),
+}
+
+# Sort key -> JSON types its cursor value may have; anything else would reach the driver as a bad parameter
+CURSOR_VALUE_TYPES = {
+    "title": (str,),
+    "price_asc": (int, float),
+    "price_desc": (int, float),
+    "newest": (int,),
+    "relevance": (int, float),
+}
+
+
+# Columns returned for each item; selected directly so listing queries skip ORM object hydration
+ITEM_COLUMNS = (
+    Item.id,
+    Item.title,
+    Item.price,
+    Item.seller_id,
+    Item.category,
+    Item.description,
+    Item.image,
+    Item.image_hash,
+    Item.is_active,
+)
+
+
+def serialize_item(item, seller_email: str | None) -> dict:
+    """Build the ItemPublic payload from an Item or a projection row of ITEM_COLUMNS.
+
+    Plain dicts go straight to orjson, skipping per-item model validation and jsonable_encoder.
+    """
+    return {
+        "id": item.id,
+        "title": item.title,
+        "price": item.price,
+        "seller_id": item.seller_id,
+        "category": item.category,
+        "description": item.description,
+        "image": item.image,
+        "image_hash": item.image_hash,
+        "is_active": item.is_active,
+        "seller": {"email": seller_email} if seller_email is not None else None
+    }
+
+
+def encode_cursor(value: Any, item_id: int, sort: str) -> str:
+    """Pack the last row's sort value and id into an opaque, URL-safe cursor"""
+    raw = json.dumps([sort, value, item_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """Unpack a cursor made by encode_cursor, rejecting tampered cursors or ones from another sort order"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    # bool is a subclass of int, so true/false have to be turned away explicitly
+    if (
+        cursor_sort != sort
+        or not isinstance(item_id, int) or isinstance(item_id, bool)
+        or not isinstance(value, CURSOR_VALUE_TYPES[sort]) or isinstance(value, bool)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order"
+        )
+    return value, item_id
 
 
 class ItemCreate(BaseModel):
@@ -17,49 +136,470 @@ class ItemCreate(BaseModel):
     is_active: bool = True
 
 
-@items_router.get("/items/active")
-def get_active_items(session: Session = Depends(get_session)):
-    """Get all active items with seller information"""
-    statement = select(Item).where(Item.is_active)
-    items = session.exec(statement).all()
-    
-    # Include seller email in response
-    result = []
-    for item in items:
-        item_dict = {
-            "id": item.id,
-            "title": item.title,
-            "price": item.price,
-            "seller_id": item.seller_id,
-            "category": item.category,
-            "description": item.description,
-            "image": item.image,
-            "is_active": item.is_active,
-            "seller": {"email": item.seller.email} if item.seller else None
-        }
-        result.append(item_dict)
-    
-    return result
+class BulkItemError(BaseModel):
+    index: int  # Position of the rejected payload in the request body
+    detail: Any
 
 
-@items_router.post("/items", status_code=status.HTTP_201_CREATED)
-def create_item(
-    item_data: ItemCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
-):
-    """Create a new item (authenticated users only)"""
-    # Validate required fields
-    if not item_data.title or not item_data.category:
+class BulkCreateResult(BaseModel):
+    created: list[ItemPublic]
+    errors: list[BulkItemError]
+
+
+class BulkItemSelection(BaseModel):
+    # Items targeted by a bulk mark-sold/delete; every given criterion must match
+    ids: list[int] | None = Field(default=None, max_length=BULK_MAX_IDS)
+    seller_id: int | None = None
+    category: str | None = None
+    created_before: datetime | None = None  # Naive values are taken as UTC
+
+
+class BulkActionResult(BaseModel):
+    affected: int
+
+
+class ItemChangeEntry(BaseModel):
+    seq: int
+    op: Literal["insert", "update", "delete"]
+    item_id: int
+    item: ItemPublic | None  # Current state of the item; None for deletes
+
+
+class ItemChanges(BaseModel):
+    changes: list[ItemChangeEntry]
+    next_since: int  # Pass back as ?since= for the following changes
+    has_more: bool  # Another page is waiting; request it right away
+
+
+class CategoryFacet(BaseModel):
+    count: int  # Active items in the category
+    min_price: float
+    max_price: float
+
+
+class ItemFacets(BaseModel):
+    total: int  # Active items in all categories
+    categories: dict[str, CategoryFacet]
+
+
+async def bulk_item_conditions(selection: BulkItemSelection, current_user: UserPublic, session: AsyncSession) -> list:
+    """WHERE clauses for a bulk selection, limited to the user's own items unless they are an admin"""
+    conditions = []
+    if selection.ids is not None:
+        conditions.append(Item.id.in_(selection.ids))
+    if selection.seller_id is not None:
+        conditions.append(Item.seller_id == selection.seller_id)
+    if selection.category is not None:
+        conditions.append(Item.category == selection.category)
+    if selection.created_before is not None:
+        created_before = selection.created_before
+        if created_before.tzinfo is None:
+            created_before = created_before.replace(tzinfo=timezone.utc)
+        else:
+            # SQLite stores timestamps without their offset, and only recent SQLModel releases convert bound values
+            # to UTC first, so convert here to compare against the stored UTC values
+            created_before = created_before.astimezone(timezone.utc)
+        # Items without a timestamp were listed before created_at existed, so they're older than any cutoff
+        conditions.append(or_(Item.created_at < created_before, Item.created_at.is_(None)))
+    if not conditions:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Title and category are required"
+            detail="Provide ids or at least one filter (seller_id, category, created_before)"
         )
-    
+    # Same rule as the single-item endpoints: only the item owner or an admin may change it
+    if not await confirm_admin(current_user, session):
+        conditions.append(Item.seller_id == current_user.id)
+    return conditions
+
+
+def item_data_error(item_data: ItemCreate) -> str | None:
+    """Business-rule check shared by single and bulk creation; returns the error message, if any"""
+    if not item_data.title or not item_data.category:
+        return "Title and category are required"
     if item_data.price <= 0:
+        return "Price must be a positive number"
+    return None
+
+
+class RowBudget:
+    """
+    Caps how many rows bulk requests may be inserting at the same time in this process.
+
+    Bulk uploads are throttled by their size rather than their count: a 500-row batch takes 500 units,
+    so a few large imports can't crowd out everyone else's writes, while small batches rarely wait.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, rows: int) -> bool:
+        with self._lock:
+            if self.in_flight and self.in_flight + rows > self.max_rows:
+                self.rejected += 1
+                return False
+            self.in_flight += rows  # A lone batch is always admitted, since BULK_MAX_ITEMS already bounds it
+            return True
+
+    def release(self, rows: int):
+        with self._lock:
+            self.in_flight -= rows
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"max_rows": self.max_rows, "in_flight": self.in_flight, "rejected": self.rejected}
+
+
+bulk_row_budget = RowBudget(BULK_MAX_ROWS_IN_FLIGHT)
+
+
+def dump_json(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, the same encoding OrjsonResponse uses"""
+    with timed("serialize"):
+        return orjson.dumps(obj)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from a hash of the exact response bytes"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header already names this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def conditional_json_response(request: Request, body: bytes, etag: str, headers: dict | None = None) -> Response:
+    """Return the JSON body, or an empty 304 when the client already has this exact version"""
+    # no-cache lets clients store the response but makes them revalidate it on every use
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def query_active_items(
+    session: AsyncSession,
+    category: str | None,
+    min_price: float | None,
+    max_price: float | None,
+    sort: str,
+    cursor: str | None,
+    limit: int | None,
+) -> tuple[list[dict], str | None, int]:
+    """Run the active catalog query for one page, returning the item dicts, the next page's cursor and the
+    newest change seq the page is current to (see CHANGES_SINCE_HEADER)"""
+    sort_column, descending = SORT_COLUMNS[sort]
+
+    # Project just the response columns plus the seller's email in one joined query,
+    # rather than hydrating Item objects and lazy-loading each item's seller.
+    # The newest change seq rides along as an uncorrelated subquery: evaluated once, in the same statement snapshot
+    statement = (
+        select(
+            *ITEM_COLUMNS,
+            User.email.label("seller_email"),
+            select(func.max(ItemChange.seq)).scalar_subquery().label("changes_since"),
+        )
+        .select_from(Item)
+        .outerjoin(User, Item.seller_id == User.id)
+        .where(Item.is_active)
+    )
+    if category is not None:
+        statement = statement.where(Item.category == category)
+    if min_price is not None:
+        statement = statement.where(Item.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Item.price <= max_price)
+
+    # Keyset pagination: seek past the last row of the previous page instead of using OFFSET,
+    # so every page is a bounded index range scan no matter how deep it is
+    if cursor is not None:
+        last_value, last_id = decode_cursor(cursor, sort)
+        if sort_column is Item.id:
+            seek = Item.id < last_id if descending else Item.id > last_id
+        elif descending:
+            seek = tuple_(sort_column, Item.id) < tuple_(last_value, last_id)
+        else:
+            seek = tuple_(sort_column, Item.id) > tuple_(last_value, last_id)
+        statement = statement.where(seek)
+
+    if sort_column is Item.id:
+        order_by = (Item.id.desc() if descending else Item.id.asc(),)
+    elif descending:
+        order_by = (sort_column.desc(), Item.id.desc())
+    else:
+        order_by = (sort_column.asc(), Item.id.asc())
+    statement = statement.order_by(*order_by)
+
+    # Without a limit or cursor the whole catalog is returned, matching the original response
+    page_size = limit if limit is not None else (DEFAULT_PAGE_SIZE if cursor is not None else None)
+    if page_size is not None:
+        statement = statement.limit(page_size + 1)  # One extra row tells us whether another page exists
+    rows = (await session.exec(statement)).all()
+    if rows:
+        changes_since = rows[0].changes_since
+    else:
+        # No row carried the seq. Read it first and query again, so the (probably still empty) page holds every
+        # change up to it even where each statement sees its own snapshot (PostgreSQL's READ COMMITTED)
+        _, changes_since = await change_log_bounds(session)
+        rows = (await session.exec(statement)).all()
+        if rows:
+            changes_since = rows[0].changes_since
+
+    next_cursor = None
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id, sort)
+
+    return [serialize_item(row, row.seller_email) for row in rows], next_cursor, changes_since or 0
+
+
+
+async def build_catalog_snapshot() -> tuple[bytes, int]:
+    """The full /items/active response body (no filters, newest first), read from the primary, and its version:
+    the newest change seq the body is current to"""
+    async with open_read_session(use_primary=True) as session:
+        items, _, changes_since = await query_active_items(session, None, None, None, "newest", None, None)
+    return dump_json(items), changes_since
+
+
+# Unfiltered /items/active is the same for every anonymous visitor, so it's served from precompressed files
+catalog_snapshot = CatalogSnapshot(
+    CATALOG_SNAPSHOT_DIR, CATALOG_SNAPSHOT_DEBOUNCE_SECONDS, build_catalog_snapshot,
+    enabled=CATALOG_SNAPSHOT, version_header=CHANGES_SINCE_HEADER,
+)
+
+
+def prepare_catalog_snapshot():
+    """Drop the snapshot builds already on disk and schedule a rebuild (called at startup)"""
+    # They may come from another database, or from this one before writes that bypass the change log (seed
+    # script, migrations, manual SQL), so none of them can be trusted to match the data
+    catalog_snapshot.discard(catalog_snapshot.versions())
+    catalog_snapshot.mark_dirty()
+
+
+def catalog_changed():
+    """Drop every cached catalog response and schedule a snapshot rebuild (call after each committed item write)"""
+    catalog_cache.invalidate()
+    catalog_snapshot.mark_dirty()
+
+
+@items_router.get("/items/active", response_model=list[ItemPublic])
+async def get_active_items(
+    request: Request,
+    category: str | None = None,
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    sort: Literal["title", "price_asc", "price_desc", "newest"] = "newest",
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Get active items with seller information, optionally filtered, sorted and paginated"""
+    # The whole catalog in its default order: send the snapshot file, with no database query or serialization
+    if not request.query_params:
+        response = catalog_snapshot.response(request, etag_matches)
+        if response is not None:
+            return response
+
+    # Serve the already-serialized response when this exact query was answered since the last item write
+    cache_key = (category, min_price, max_price, sort, cursor, limit)
+    cached = catalog_cache.get(cache_key)
+    if cached is None:
+        version = catalog_cache.version  # Read before querying so a concurrent write discards this result
+        items, next_cursor, changes_since = await query_active_items(
+            session, category, min_price, max_price, sort, cursor, limit
+        )
+        body = dump_json(items)
+        cached = (body, make_etag(body), next_cursor, changes_since)
+        # Right after a write the replica may not have it yet, so don't let a lagging result outlive the request
+        if not (session.info.get("replica") and primary_pins.replica_may_lag()):
+            catalog_cache.set(cache_key, cached, version)
+
+    # On a cache hit a matching If-None-Match is answered with 304 without touching the database or the serializer
+    body, etag, next_cursor, changes_since = cached
+    headers = {CHANGES_SINCE_HEADER: str(changes_since)}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return conditional_json_response(request, body, etag, headers)
+
+
+@items_router.get("/items/active/stream")
+async def stream_active_items(
+    format: Literal["ndjson", "json"] = "ndjson",
+    category: str | None = None,
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Stream every active item as NDJSON or a JSON array, for exports and other full-catalog consumers"""
+    statement = (
+        select(*ITEM_COLUMNS, User.email.label("seller_email"))
+        .select_from(Item)
+        .outerjoin(User, Item.seller_id == User.id)
+        .where(Item.is_active)
+        .order_by(Item.id)
+    )
+    if category is not None:
+        statement = statement.where(Item.category == category)
+    # yield_per fetches rows in batches through a server-side cursor where the driver supports one,
+    # so only one batch is held in memory at a time
+    statement = statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    # The request's session may be closed once the endpoint returns, so the generator opens its own on the same engine
+    bind = session.bind
+
+    async def generate_chunks():
+        async with AsyncSession(bind) as stream_session:
+            if format == "json":
+                yield b"["
+            first = True
+            result = await stream_session.stream(statement)
+            async for batch in result.partitions():
+                lines = [dump_json(serialize_item(row, row.seller_email)) for row in batch]
+                if format == "ndjson":
+                    yield b"\n".join(lines) + b"\n"
+                else:
+                    yield (b"" if first else b",") + b",".join(lines)
+                first = False
+            if format == "json":
+                yield b"]"
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(generate_chunks(), media_type=media_type)
+
+
+@items_router.get("/items/search", response_model=list[ItemPublic])
+async def search_items(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Full-text search over active item titles and descriptions, best matches first"""
+    dialect = session.bind.dialect.name
+    match_query = build_match_query(q, dialect)
+    if match_query is None:
+        body = dump_json([])
+        return conditional_json_response(request, body, make_etag(body))
+
+    hits = search_hits(match_query, dialect)
+    statement = (
+        select(*ITEM_COLUMNS, User.email.label("seller_email"), hits.c.rank)
+        .select_from(hits)
+        .join(Item, Item.id == hits.c.id)
+        .outerjoin(User, Item.seller_id == User.id)
+        .where(Item.is_active)
+    )
+    # Same keyset scheme as /items/active, seeking on (rank, id)
+    if cursor is not None:
+        last_rank, last_id = decode_cursor(cursor, "relevance")
+        statement = statement.where(tuple_(hits.c.rank, hits.c.id) > tuple_(last_rank, last_id))
+    statement = statement.order_by(hits.c.rank, hits.c.id).limit(limit + 1)
+    rows = (await session.exec(statement)).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].rank, rows[-1].id, "relevance")
+
+    body = dump_json([serialize_item(row, row.seller_email) for row in rows])
+    return conditional_json_response(request, body, make_etag(body), headers)
+
+
+@items_router.get("/items/changes", response_model=ItemChanges)
+async def get_item_changes(
+    since: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=MAX_CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Items inserted, updated or deleted after change `since`, oldest first, for keeping a local copy in sync.
+
+    Start polling from the X-Changes-Since header of the /items/active response the copy was loaded from. That
+    value belongs to the body itself, which may be an older snapshot than the log's current position. Without
+    `since` nothing is returned but that position. An item changed several times is reported once, at its latest change.
+    """
+    oldest, newest = await change_log_bounds(session)
+    if since is None:
+        return {"changes": [], "next_since": newest or 0, "has_more": False}
+    if since > (newest or 0) and session.info.get("replica"):
+        # The cursor may come from the primary (snapshots are built there) while the replica hasn't caught up,
+        # so only the primary can tell whether it's valid
+        async with open_read_session(use_primary=True) as primary:
+            return await read_item_changes(primary, since, limit)
+    return await read_item_changes(session, since, limit, (oldest, newest))
+
+
+async def read_item_changes(session: AsyncSession, since: int, limit: int, bounds: tuple[int | None, int | None] | None = None) -> dict:
+    """One page of /items/changes after `since`, read through `session` (whose change log bounds may be passed in)"""
+    oldest, newest = bounds if bounds is not None else await change_log_bounds(session)
+    # Compaction only deletes whole prefixes of the log, so a cursor before the oldest change may have missed some.
+    # A cursor past the newest comes from another database (e.g. one that was reset)
+    if (oldest is not None and since < oldest - 1) or since > (newest or 0):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Change cursor is no longer valid; reload /items/active and start again from its X-Changes-Since header"
+        )
+
+    latest = (
+        select(ItemChange.item_id, func.max(ItemChange.seq).label("seq"))
+        .where(ItemChange.seq > since)
+        .group_by(ItemChange.item_id)
+        .subquery()
+    )
+    rows = (await session.exec(
+        select(latest.c.seq, latest.c.item_id, ItemChange.op, *ITEM_COLUMNS, User.email.label("seller_email"))
+        .select_from(latest)
+        .join(ItemChange, ItemChange.seq == latest.c.seq)
+        .outerjoin(Item, Item.id == latest.c.item_id)
+        .outerjoin(User, Item.seller_id == User.id)
+        .order_by(latest.c.seq)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for row in rows:
+        # An item removed outside the API (e.g. by a script) has no delete entry, but it's still gone
+        op = row.op if row.id is not None else "delete"
+        item = serialize_item(row, row.seller_email) if op != "delete" else None
+        changes.append({"seq": row.seq, "op": op, "item_id": row.item_id, "item": item})
+    return {"changes": changes, "next_since": rows[-1].seq if rows else since, "has_more": has_more}
+
+
+@items_router.get("/items/facets", response_model=ItemFacets)
+async def get_item_facets(
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """Active item count and price range per category, for the catalog filters"""
+    # The primary session is only used when the counts need a recount or a price range refresh
+    categories = await current_facets(session)
+    body = dump_json({"total": sum(facet["count"] for facet in categories.values()), "categories": categories})
+    return conditional_json_response(request, body, make_etag(body))
+
+
+@items_router.post("/items", response_model=ItemPublic, status_code=status.HTTP_201_CREATED)
+async def create_item(
+    item_data: ItemCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
+):
+    """Create a new item (authenticated users only)"""
+    error = item_data_error(item_data)
+    if error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Price must be a positive number"
+            detail=error
         )
     
     # Create new item
@@ -74,31 +614,140 @@ def create_item(
     )
     
     session.add(new_item)
-    session.commit()
-    session.refresh(new_item)
+    await session.flush()  # Assigns the id so the item can be indexed in the same transaction
+    await index_item(session, new_item)
+    await record_item_changes(session, "insert", [new_item.id])
+    await session.commit()
+    catalog_changed()
+    if new_item.is_active:
+        facet_counts.add([(new_item.category, new_item.price)])
+    primary_pins.pin(current_user.username)  # Read-your-writes: this user's next reads go to the primary
     
     # Return item with seller info
-    return {
-        "id": new_item.id,
-        "title": new_item.title,
-        "price": new_item.price,
-        "seller_id": new_item.seller_id,
-        "category": new_item.category,
-        "description": new_item.description,
-        "image": new_item.image,
-        "is_active": new_item.is_active,
-        "seller": {"email": current_user.email}
-    }
+    return serialize_item(new_item, current_user.email)
+
+
+@items_router.post("/items/bulk", response_model=BulkCreateResult, status_code=status.HTTP_201_CREATED)
+async def create_items_bulk(
+    payloads: list[dict[str, Any]] = Body(...),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
+):
+    """Create up to BULK_MAX_ITEMS items in one transaction (authenticated users only).
+
+    Each payload is validated on its own: invalid ones are reported in "errors" by position
+    and the valid ones are still created, all with a single multi-row INSERT ... RETURNING.
+    """
+    if not payloads:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one item is required"
+        )
+    if len(payloads) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} items can be created per request"
+        )
+
+    rows, errors = [], []
+    for index, payload in enumerate(payloads):
+        try:
+            item_data = ItemCreate.model_validate(payload)
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": exc.errors(include_url=False, include_context=False)})
+            continue
+        error = item_data_error(item_data)
+        if error:
+            errors.append({"index": index, "detail": error})
+            continue
+        rows.append({**item_data.model_dump(), "seller_id": current_user.id})
+
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=errors
+        )
+
+    if not bulk_row_budget.try_acquire(len(rows)):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many items are being created right now, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        # One multi-row INSERT ... RETURNING. render_nulls stops the ORM from splitting rows into one statement
+        # per set of non-null keys. RETURNING order isn't guaranteed, but ids are assigned in VALUES order, so sorting
+        # by id lines rows back up with the payloads (sort_by_parameter_order would make SQLite insert row by row)
+        statement = insert(Item).returning(*ITEM_COLUMNS).execution_options(render_nulls=True)
+        created = sorted((await session.exec(statement, params=rows)).all(), key=lambda row: row.id)
+        await index_items(session, created)
+        await record_item_changes(session, "insert", (row.id for row in created))
+        await session.commit()
+    finally:
+        bulk_row_budget.release(len(rows))
+    catalog_changed()
+    facet_counts.add((row.category, row.price) for row in created if row.is_active)
+    primary_pins.pin(current_user.username)
+
+    return {"created": [serialize_item(row, current_user.email) for row in created], "errors": errors}
+
+
+# Declared before the /items/{item_id} routes, which would otherwise capture "bulk" as an item id
+@items_router.put("/items/bulk/mark-sold", response_model=BulkActionResult, status_code=status.HTTP_200_OK)
+async def mark_items_as_sold_bulk(
+    selection: BulkItemSelection,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
+):
+    """Mark every matching active item as sold with one UPDATE (owner's items, or any item for admins)"""
+    conditions = [*await bulk_item_conditions(selection, current_user, session), Item.is_active]
+    await remove_items_from_index(session, select(Item.id).where(*conditions))
+    # RETURNING hands back what was sold, so the facet counts can be adjusted without another query
+    sold = (await session.exec(
+        update(Item).where(*conditions).values(is_active=False)
+        .returning(Item.id, Item.category, Item.price)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await record_item_changes(session, "update", (row.id for row in sold))
+    await session.commit()
+    if sold:
+        catalog_changed()
+        facet_counts.remove((row.category, row.price) for row in sold)
+        primary_pins.pin(current_user.username)
+    return {"affected": len(sold)}
+
+
+@items_router.post("/items/bulk/delete", response_model=BulkActionResult, status_code=status.HTTP_200_OK)
+async def delete_items_bulk(
+    selection: BulkItemSelection,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
+):
+    """Delete every matching item with one DELETE (owner's items, or any item for admins)"""
+    conditions = await bulk_item_conditions(selection, current_user, session)
+    await remove_items_from_index(session, select(Item.id).where(*conditions))
+    deleted = (await session.exec(
+        delete(Item).where(*conditions)
+        .returning(Item.id, Item.category, Item.price, Item.is_active)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await record_item_changes(session, "delete", (row.id for row in deleted))
+    await session.commit()
+    if deleted:
+        catalog_changed()
+        facet_counts.remove((row.category, row.price) for row in deleted if row.is_active)
+        primary_pins.pin(current_user.username)
+    return {"affected": len(deleted)}
 
 
 @items_router.delete("/items/{item_id}", status_code=status.HTTP_200_OK)
-def delete_item(
+async def delete_item(
     item_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
 ):
     """Delete an item (owner or admin only)"""
-    item = session.get(Item, item_id)
+    item = await session.get(Item, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -106,52 +755,127 @@ def delete_item(
         )
     
     # Check authorization: only item owner or admin can delete
-    if item.seller_id != current_user.id and not current_user.is_admin:
+    if item.seller_id != current_user.id and not await confirm_admin(current_user, session):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this item"
         )
     
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await remove_item_from_index(session, item.id)
+    await record_item_changes(session, "delete", [item.id])
+    await session.commit()
+    catalog_changed()
+    if item.is_active:
+        facet_counts.remove([(item.category, item.price)])
+    primary_pins.pin(current_user.username)  # Read-your-writes: this user's next reads go to the primary
     return {"detail": "Item deleted successfully"}
 
 
-@items_router.put("/items/{item_id}/mark-sold", status_code=status.HTTP_200_OK)
-def mark_item_as_sold(
+@items_router.put("/items/{item_id}/mark-sold", response_model=ItemPublic, status_code=status.HTTP_200_OK)
+async def mark_item_as_sold(
     item_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
 ):
     """Mark an item as sold (owner or admin only)"""
-    item = session.get(Item, item_id)
-    if not item:
+    # Load the item together with its seller's email so the response needs no extra lazy load
+    row = (await session.exec(
+        select(Item, User.email)
+        .outerjoin(User, Item.seller_id == User.id)
+        .where(Item.id == item_id)
+    )).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found"
         )
+    item, seller_email = row
     
     # Check authorization: only item owner or admin can mark as sold
-    if item.seller_id != current_user.id and not current_user.is_admin:
+    if item.seller_id != current_user.id and not await confirm_admin(current_user, session):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to mark this item as sold"
         )
     
+    was_active = item.is_active
     item.is_active = False
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await remove_item_from_index(session, item.id)  # Sold items no longer appear in search
+    await record_item_changes(session, "update", [item.id])
+    await session.commit()
+    catalog_changed()
+    if was_active:
+        facet_counts.remove([(item.category, item.price)])
+    primary_pins.pin(current_user.username)  # Read-your-writes: this user's next reads go to the primary
     
     # Return updated item with seller info
-    return {
-        "id": item.id,
-        "title": item.title,
-        "price": item.price,
-        "seller_id": item.seller_id,
-        "category": item.category,
-        "description": item.description,
-        "image": item.image,
-        "is_active": item.is_active,
-        "seller": {"email": item.seller.email} if item.seller else None
-    }
\ No newline at end of file
+    return serialize_item(item, seller_email)
+
+
+@items_router.post("/items/{item_id}/image", response_model=ItemPublic, status_code=status.HTTP_200_OK)
+async def upload_item_image(
+    item_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserPublic = Depends(get_current_user)
+):
+    """Upload an item's image as the raw request body (owner or admin only).
+
+    The body is streamed to content-addressed storage and the item is pointed at /images/{hash};
+    thumbnail and card variants are generated in the background.
+    """
+    seller_id = (await session.exec(select(Item.seller_id).where(Item.id == item_id))).first()
+    if seller_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    if seller_id != current_user.id and not await confirm_admin(current_user, session):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to change this item's image"
+        )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > IMAGE_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Images may be at most {IMAGE_MAX_BYTES} bytes"
+        )
+    await session.rollback()  # Return the connection to the pool while the body is streamed in, which may be slow
+
+    try:
+        image_hash, original = await store_upload(request.stream(), IMAGE_MAX_BYTES)
+    except ImageTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Images may be at most {IMAGE_MAX_BYTES} bytes"
+        )
+    except UnsupportedImage:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload a JPEG, PNG, WebP or GIF image"
+        )
+    image_processor.submit(image_hash, original)
+
+    row = (await session.exec(
+        select(Item, User.email)
+        .outerjoin(User, Item.seller_id == User.id)
+        .where(Item.id == item_id)
+    )).first()
+    if not row:  # Deleted while the upload was streaming; the stored file is shared by hash and harmless
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    item, seller_email = row
+    item.image = f"/images/{image_hash}"
+    item.image_hash = image_hash
+    session.add(item)
+    await record_item_changes(session, "update", [item.id])
+    await session.commit()
+    catalog_changed()
+    primary_pins.pin(current_user.username)  # Read-your-writes: this user's next reads go to the primary
+
+    return serialize_item(item, seller_email)
@@ -3,17 +3,32 @@ Idempotent database seeding script for Gator Marketplace.
 
 Creates 5 users (2 admins, 3 regular users) and 100 items (20 per category).
 Safe to run multiple times - skips existing users and items.
+
+Load-test mode adds synthetic data on top:
+    python -m backend.scripts.seed_db --users 1000 --items 1000000 [--seed 42]
+Synthetic users are loadtest<N>@ufl.edu with password LoadPass<N>!, and synthetic items are
+generated from a seeded RNG, so the same arguments always produce the same dataset.
 """
 
+import argparse
+import csv
+import io
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from sqlalchemy import insert
 from sqlmodel import Session, select
 from backend.database import engine
 from backend.models import User, Item
+from backend.search import initialize_search_index
 from backend.security import get_password_hash
 
 
@@ -150,6 +165,17 @@ ITEM_TEMPLATES = {
 }
 
 
+# Load-test data
+LOAD_TEST_USERNAME = "loadtest{n}"
+LOAD_TEST_EMAIL = "loadtest{n}@ufl.edu"
+LOAD_TEST_PASSWORD = "LoadPass{n}!"
+LOAD_TEST_TITLE_MARKER = " — Load #"  # Synthetic item titles are "<template> — Load #<n>"
+LOAD_TEST_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)  # Synthetic created_at values fall in the year before this
+LOAD_TEST_SOLD_RATIO = 0.1  # Share of synthetic items generated as already sold
+INSERT_BATCH_SIZE = 10_000  # Rows per executemany / COPY chunk
+ITEM_COLUMNS = ["title", "description", "price", "category", "image", "is_active", "seller_id", "created_at"]
+
+
 def create_seed_users(session: Session) -> dict[str, User]:
     """Create seed users if they don't exist. Returns dict of email -> User."""
     users = {}
@@ -200,6 +226,7 @@ def create_seed_items(session: Session, users: dict[str, User]):
     category_stats = {cat: {"created": 0, "existing": 0} for cat in categories}
     
     item_counter = 1
+    new_items = []
     
     for category in categories:
         templates = ITEM_TEMPLATES[category]
@@ -221,29 +248,28 @@ def create_seed_items(session: Session, users: dict[str, User]):
             price_fraction = (i % len(templates)) / max(len(templates) - 1, 1)
             price = round(price_min + (price_max - price_min) * price_fraction, 2)
             
-            # Check if item already exists (by unique title)
-            existing_item = session.exec(
-                select(Item).where(Item.title == title)
-            ).first()
-            
-            if existing_item:
-                category_stats[category]["existing"] += 1
-            else:
-                # Create new item
-                new_item = Item(
-                    title=title,
-                    description=f"{title_base} for {category} category. High quality and great condition!",
-                    price=price,
-                    category=category,
-                    image=category_image,
-                    is_active=True,
-                    seller_id=user.id
-                )
-                session.add(new_item)
-                category_stats[category]["created"] += 1
-            
+            new_items.append(Item(
+                title=title,
+                description=f"{title_base} for {category} category. High quality and great condition!",
+                price=price,
+                category=category,
+                image=category_image,
+                is_active=True,
+                seller_id=user.id
+            ))
             item_counter += 1
     
+    # Check which items already exist (by unique title) in one query rather than one per item
+    existing_titles = set(session.exec(
+        select(Item.title).where(Item.title.in_([item.title for item in new_items]))
+    ).all())
+    for item in new_items:
+        if item.title in existing_titles:
+            category_stats[item.category]["existing"] += 1
+        else:
+            session.add(item)
+            category_stats[item.category]["created"] += 1
+    
     # Commit all items at once
     session.commit()
     
@@ -274,8 +300,111 @@ def create_seed_items(session: Session, users: dict[str, User]):
     print("-" * 50)
 
 
-def main():
+def hash_passwords(passwords: list[str], workers: int | None) -> list[str]:
+    """bcrypt-hash passwords across a process pool; each hash costs the same CPU time as a login"""
+    if len(passwords) < 2:
+        return [get_password_hash(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(get_password_hash, passwords, chunksize=16))
+
+
+def copy_statement(dialect, table, columns: list[str]) -> str:
+    """COPY ... FROM STDIN for the table and columns, quoted for the dialect (user is a reserved word in PostgreSQL)"""
+    preparer = dialect.identifier_preparer
+    quoted_columns = ", ".join(preparer.quote(column) for column in columns)
+    return f"COPY {preparer.format_table(table)} ({quoted_columns}) FROM STDIN WITH (FORMAT csv)"
+
+
+def insert_rows(session: Session, table, columns: list[str], rows) -> int:
+    """
+    Insert an iterable of row dicts in INSERT_BATCH_SIZE chunks on the session's connection (commit afterwards).
+    PostgreSQL gets COPY FROM STDIN; other databases get a single executemany per chunk.
+    """
+    conn = session.connection()
+    inserted = 0
+    while batch := list(islice(rows, INSERT_BATCH_SIZE)):
+        if conn.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow([row[column] for column in columns])  # None is written as an unquoted empty field, i.e. NULL
+            buffer.seek(0)
+            with conn.connection.cursor() as cursor:
+                cursor.copy_expert(copy_statement(conn.dialect, table, columns), buffer)
+        else:
+            conn.execute(insert(table), batch)
+        inserted += len(batch)
+    return inserted
+
+
+def create_load_test_users(session: Session, count: int, workers: int | None) -> list[int]:
+    """Create loadtest1..loadtest<count> if missing. Returns their ids in order, so index n-1 is loadtest<n>."""
+    emails = [LOAD_TEST_EMAIL.format(n=n) for n in range(1, count + 1)]
+    existing = set(session.exec(select(User.email).where(User.email.like(LOAD_TEST_EMAIL.format(n="%")))).all())
+    missing = [n for n in range(1, count + 1) if LOAD_TEST_EMAIL.format(n=n) not in existing]
+
+    started = time.perf_counter()
+    hashes = hash_passwords([LOAD_TEST_PASSWORD.format(n=n) for n in missing], workers)
+    print(f"✓ Hashed {len(hashes)} passwords in {time.perf_counter() - started:.1f}s")
+    insert_rows(session, User.__table__, ["username", "email", "hashed_password", "is_admin"], iter(
+        {"username": LOAD_TEST_USERNAME.format(n=n), "email": LOAD_TEST_EMAIL.format(n=n), "hashed_password": hashed, "is_admin": False}
+        for n, hashed in zip(missing, hashes)
+    ))
+    session.commit()
+    print(f"📊 Load-test users: {len(missing)} created, {count - len(missing)} already existed")
+
+    ids = dict(session.exec(select(User.email, User.id).where(User.email.like(LOAD_TEST_EMAIL.format(n="%")))).all())
+    return [ids[email] for email in emails]
+
+
+def generate_load_test_items(count: int, seller_ids: list[int], seed: int):
+    """Yield `count` synthetic item rows. Every value comes from random.Random(seed), so runs are reproducible."""
+    rng = random.Random(seed)
+    categories = list(ITEM_TEMPLATES)
+    for n in range(1, count + 1):
+        category = rng.choice(categories)
+        title_base, price_min, price_max = rng.choice(ITEM_TEMPLATES[category])
+        yield {
+            "title": f"{title_base}{LOAD_TEST_TITLE_MARKER}{n}",
+            "description": f"{title_base} for {category} category. Load-test listing.",
+            "price": round(rng.uniform(price_min, price_max), 2),
+            "category": category,
+            "image": CATEGORY_IMAGES[category],
+            "is_active": rng.random() >= LOAD_TEST_SOLD_RATIO,
+            "seller_id": seller_ids[rng.randrange(len(seller_ids))],
+            "created_at": LOAD_TEST_EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+        }
+
+
+def create_load_test_items(session: Session, count: int, seller_ids: list[int], seed: int):
+    """Bulk-insert the synthetic items that don't exist yet"""
+    # One query for every synthetic title already present, instead of a lookup per item
+    existing = set(session.exec(select(Item.title).where(Item.title.contains(LOAD_TEST_TITLE_MARKER))).all())
+    rows = (row for row in generate_load_test_items(count, seller_ids, seed) if row["title"] not in existing)
+
+    started = time.perf_counter()
+    inserted = insert_rows(session, Item.__table__, ITEM_COLUMNS, rows)
+    session.commit()
+    elapsed = time.perf_counter() - started
+    rate = f" ({inserted / elapsed:,.0f} rows/s)" if inserted and elapsed else ""
+    print(f"📊 Load-test items: {inserted} created in {elapsed:.1f}s{rate}, {count - inserted} already existed")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=0, help="Synthetic load-test users to ensure exist (default 0)")
+    parser.add_argument("--items", type=int, default=0, help="Synthetic load-test items to ensure exist (default 0)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for synthetic items (default 42)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to hash passwords (default: CPU count)")
+    args = parser.parse_args(argv)
+    if args.items and not args.users:
+        parser.error("--items needs --users to assign sellers")
+    return args
+
+
+def main(argv=None):
     """Main seeding function."""
+    args = parse_args(argv)
     print("=" * 60)
     print("🌱 Starting Database Seed Script")
     print("=" * 60)
@@ -297,6 +426,16 @@ def main():
         print("📦 Creating/Verifying Seed Items...")
         print("-" * 50)
         create_seed_items(session, users)
+        
+        if args.users:
+            print("\n🧪 Creating/Verifying Load-Test Data...")
+            print("-" * 50)
+            seller_ids = create_load_test_users(session, args.users, args.workers)
+            if args.items:
+                create_load_test_items(session, args.items, seller_ids, args.seed)
+    
+    # Seed items are inserted directly, so backfill them into the full-text search index
+    initialize_search_index(engine)
     
     print()
     print("=" * 60)
@@ -0,0 +1,95 @@
+from sqlalchemy import Float, Integer, Select, column, delete, table, text
+from sqlalchemy.engine import Engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+import re
+
+from backend.models import Item
+
+# Full-text index over item titles and descriptions.
+# SQLite uses an FTS5 virtual table that the item routes keep in sync explicitly.
+# PostgreSQL uses a GIN expression index over a tsvector, which the database maintains on its own.
+SQLITE_SEARCH_TABLE = "item_search"
+POSTGRES_SEARCH_INDEX = "ix_item_search_document"
+POSTGRES_SEARCH_DOCUMENT = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+search_table = table(SQLITE_SEARCH_TABLE, column("rowid"))
+
+
+def initialize_search_index(engine: Engine):
+    """Create the full-text index for the engine's dialect and backfill any active items missing from it"""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} "
+                "USING fts5(title, description, tokenize='porter unicode61')"
+            ))
+            conn.execute(text(
+                f"INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, title, description) "
+                "SELECT id, title, coalesce(description, '') FROM item "
+                f"WHERE is_active AND id NOT IN (SELECT rowid FROM {SQLITE_SEARCH_TABLE})"
+            ))
+        elif engine.dialect.name == "postgresql":
+            # Partial index: sold items never show up in search, so they don't need to be indexed
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_SEARCH_INDEX} ON item "
+                f"USING GIN ({POSTGRES_SEARCH_DOCUMENT}) WHERE is_active"
+            ))
+
+
+async def index_item(session: AsyncSession, item: Item):
+    """Add a newly created item to the search index (call before committing the item's transaction)"""
+    await index_items(session, [item])
+
+
+async def index_items(session: AsyncSession, items: list):
+    """Add newly created items (Item objects or rows with the same attributes) to the search index in one statement"""
+    if session.bind.dialect.name != "sqlite":
+        return  # The PostgreSQL expression index updates itself
+    params = [
+        {"id": item.id, "title": item.title, "description": item.description or ""}
+        for item in items if item.is_active
+    ]
+    if params:
+        await session.exec(
+            text(f"INSERT INTO {SQLITE_SEARCH_TABLE} (rowid, title, description) VALUES (:id, :title, :description)"),
+            params=params,
+        )
+
+
+async def remove_item_from_index(session: AsyncSession, item_id: int):
+    """Drop an item from the search index (call before committing the item's transaction)"""
+    if session.bind.dialect.name != "sqlite":
+        return
+    await session.exec(text(f"DELETE FROM {SQLITE_SEARCH_TABLE} WHERE rowid = :id"), params={"id": item_id})
+
+
+async def remove_items_from_index(session: AsyncSession, item_ids: Select):
+    """Drop every item selected by `item_ids` (a SELECT of item ids) from the search index in one statement.
+    Run it before the statement that deletes or deactivates those items, since the subquery is evaluated against them."""
+    if session.bind.dialect.name != "sqlite":
+        return
+    await session.exec(delete(search_table).where(search_table.c.rowid.in_(item_ids)))
+
+
+def build_match_query(q: str, dialect: str) -> str | None:
+    """Turn free-form user input into a safe prefix-matching full-text query, or None if it has no search terms"""
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return None
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_hits(match_query: str, dialect: str):
+    """Subquery of matching item ids and their rank, where a lower rank is a better match"""
+    if dialect == "postgresql":
+        statement = text(
+            f"SELECT id, -ts_rank_cd({POSTGRES_SEARCH_DOCUMENT}, query) AS rank "
+            "FROM item, to_tsquery('english', :match_query) AS query "
+            f"WHERE is_active AND {POSTGRES_SEARCH_DOCUMENT} @@ query"
+        )
+    else:
+        statement = text(
+            f"SELECT rowid AS id, rank FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH :match_query"
+        )
+    return statement.bindparams(match_query=match_query).columns(id=Integer, rank=Float).subquery("hits")
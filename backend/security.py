@@ -1,9 +1,14 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from backend.timing import timed
+import asyncio
 import jwt
+import multiprocessing
 import os
+import threading
 
 load_dotenv()
 SECRET_KEY = os.environ.get("SECRET_KEY")
@@ -18,6 +23,9 @@ elif not ALGORITHM:
 elif not ACCESS_TOKEN_EXPIRE_MINUTES:
     raise ValueError("ACCESS_TOKEN_EXPIRE_MINUTES was not found, verify .env file.")
 
+# Opt-in: put the user id, email and admin flag in access tokens so get_current_user needs no DB lookup
+SELF_CONTAINED_TOKENS = os.environ.get("SELF_CONTAINED_TOKENS", "false").lower() in ("1", "true", "yes")
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  # Sets up the password hashing system with the bcrypt hashing algorithm
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -26,14 +34,92 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) ->str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(Exception):
+    # Raised when too many hashing jobs are already waiting, so callers can shed load instead of queueing forever
+    pass
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt on a dedicated, size-limited process pool.
+
+    Each bcrypt call burns 100-300 ms of CPU. Running it in worker processes keeps it off the event loop
+    and past the GIL, and limits it to `workers` cores so a login storm slows down logins only.
+    At most `max_pending` jobs may be running or queued; beyond that run() raises PasswordHasherBusy.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0  # Jobs submitted and not yet finished (running + queued)
+        self.completed = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the server process is multi-threaded, which fork doesn't handle safely
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def run(self, func: Callable, *args) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+        try:
+            with timed("bcrypt"):
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.pending,
+                "queue_depth": max(self.pending - self.workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+BCRYPT_MAX_PENDING = int(os.environ.get("BCRYPT_MAX_PENDING", "64"))
+password_hash_pool = PasswordHashPool(BCRYPT_WORKERS, BCRYPT_MAX_PENDING)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
+
 # Generates the JWT, with the subject being the username or user ID
-def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
+# Extra claims (e.g. uid/email/adm for self-contained tokens) are added as given
+def create_access_token(subject: str | Any, expires_delta: timedelta | None = None, claims: dict | None = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
 
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     return encoded_jwt
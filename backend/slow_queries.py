@@ -0,0 +1,140 @@
+from collections import deque
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import os
+import threading
+import orjson
+
+from backend.timing import current_route
+
+load_dotenv()
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))  # Negative disables the recorder
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", "100"))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+
+MAX_STATEMENT_CHARS = 4000
+MAX_SHAPE_ITEMS = 20  # Longer parameter lists (multi-row inserts) are summarized by count and types
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+slow_query_logger = logging.getLogger("backend.slow_queries")
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Parameter names and types without their values, which may hold personal data or password hashes"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > MAX_SHAPE_ITEMS:
+            return {"count": len(parameters), "types": sorted({type(value).__name__ for value in parameters})}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Bounded ring buffer of statements that ran longer than `threshold_ms`, newest last.
+
+    Each entry keeps the statement, its parameter shape, the route that ran it and, when enabled,
+    the database's plan for it. Like the caches, it is per process.
+    """
+
+    def __init__(self, threshold_ms: float, max_entries: int, explain: bool):
+        self.threshold_seconds = threshold_ms / 1000
+        self.explain = explain
+        self.recorded = 0
+        self._entries: deque[dict] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(self, entry: dict):
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            return list(reversed(self._entries))  # Newest first
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.recorded = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_seconds * 1000,
+                "max_entries": self._entries.maxlen,
+                "recorded": self.recorded,
+                "entries": list(reversed(self._entries)),
+            }
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN)
+
+
+def explain(conn, statement: str, parameters: Any) -> list[str]:
+    """The database's plan for a statement that just ran on `conn`, without executing it again"""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return []
+    # A raw DBAPI cursor on the same connection: same transaction, and no SQLAlchemy events, so no recursion
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # A failed EXPLAIN would abort the caller's transaction, so fence it in a savepoint
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return [row[0] for row in rows]
+        cursor.execute(prefix + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]  # (id, parent, notused, detail)
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None or slow_query_log.threshold_seconds < 0:
+        return
+    elapsed = perf_counter() - started
+    if elapsed < slow_query_log.threshold_seconds:
+        return
+
+    plan = None
+    if slow_query_log.explain and statement.lstrip().lower().startswith(EXPLAINABLE):
+        try:
+            plan = explain(conn, statement, parameters[0] if executemany else parameters)
+        except Exception as exc:  # Diagnostics must never break the query that triggered them
+            plan = [f"EXPLAIN failed: {exc}"]
+
+    entry = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed * 1000, 2),
+        "route": current_route(),
+        "statement": statement[:MAX_STATEMENT_CHARS],
+        "parameters": {"rows": len(parameters), "row": parameter_shape(parameters[0]) if parameters else None}
+        if executemany else parameter_shape(parameters),
+        "plan": plan,
+    }
+    slow_query_log.record(entry)
+    slow_query_logger.warning(orjson.dumps(entry).decode())
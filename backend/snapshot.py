@@ -0,0 +1,226 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Iterable
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+from dotenv import load_dotenv
+import anyio
+import asyncio
+import brotli
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+load_dotenv()
+CATALOG_SNAPSHOT = os.environ.get("CATALOG_SNAPSHOT", "true").lower() in ("1", "true", "yes")
+CATALOG_SNAPSHOT_DIR = Path(os.environ.get("CATALOG_SNAPSHOT_DIR", Path(__file__).parent / "media" / "snapshot"))
+CATALOG_SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get("CATALOG_SNAPSHOT_DEBOUNCE_SECONDS", "2"))
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9  # 10-11 shrink JSON only slightly more but take several times longer on large catalogs
+# Content coding -> file suffix, in order of preference when the client accepts several equally
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+# Published versions kept on disk. The one before the newest stays, so a worker that picked it just before a
+# publish can still open its file
+KEPT_VERSIONS = 2
+
+snapshot_logger = logging.getLogger("backend.snapshot")
+
+
+def accepted_encodings(accept_encoding: str) -> list[str | None]:
+    """Precompressed codings the client accepts, best first, always ending with None (identity)"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    default = weights.get("*", 0.0)
+    ranked = [(weights.get(coding, default), coding) for coding in ENCODINGS]
+    # sorted() is stable, so ties keep ENCODINGS order (br before gzip)
+    return [coding for weight, coding in sorted(ranked, key=lambda pair: -pair[0]) if weight > 0] + [None]
+
+
+class CatalogSnapshot:
+    """
+    A response body precomputed on disk as JSON, gzip and brotli files, served straight from the files.
+
+    Item writes call mark_dirty(). The rebuild runs as a background task `debounce_seconds` later, so a burst
+    of writes costs one rebuild. While this process has writes that aren't in the files yet, response()
+    returns None and the caller answers from the database. Other workers keep serving the files they see,
+    which lag by at most a debounce plus a build.
+
+    `build` returns the body and a version that only grows as the data changes. All workers share `directory`,
+    and each build is published as its own directory, named by the version and a hash of the body and renamed
+    into place complete, so a build that started earlier but finished later can't replace a newer one, and all
+    encodings come from the same build. The highest version is served, the latest published first among builds
+    of the same version with different bodies (the data changed without the version moving, e.g. a seed script).
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        debounce_seconds: float,
+        build: Callable[[], Awaitable[tuple[bytes, int]]],
+        enabled: bool = True,
+        version_header: str | None = None,
+    ):
+        self.directory = directory
+        self.debounce_seconds = debounce_seconds
+        self.build = build
+        self.enabled = enabled
+        self.version_header = version_header  # Response header that carries the served version, if any
+        self.dirty = False
+        self.generation = 0  # Bumped by every mark_dirty(); a rebuild only clears `dirty` if none happened during it
+        self.builds = 0
+        self.failures = 0
+        self.served = 0
+        self.last_build_ms: float | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = threading.Lock()
+
+    def versions(self) -> list[str]:
+        """Names of the published builds in the directory, oldest first"""
+        try:
+            with os.scandir(self.directory) as entries:
+                builds = []
+                for entry in entries:
+                    version, _, digest = entry.name.partition("-")
+                    if version.isdigit() and digest:
+                        try:
+                            builds.append((int(version), entry.stat().st_mtime_ns, entry.name))
+                        except FileNotFoundError:
+                            continue  # Pruned while listing
+        except FileNotFoundError:
+            return []
+        return [name for _, _, name in sorted(builds)]
+
+    @staticmethod
+    def version_of(name: str) -> int:
+        return int(name.partition("-")[0])
+
+    def path(self, name: str, encoding: str | None = None) -> Path:
+        return self.directory / name / f"catalog.json{ENCODINGS.get(encoding, '')}"
+
+    def mark_dirty(self):
+        """Stop serving the files and schedule a rebuild (call after each committed item write)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.dirty = True
+            self.generation += 1
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # No event loop (e.g. a script); stays dirty until the next write from the app
+            if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+                return  # The pending rebuild will pick this write up
+            self._task = loop.create_task(self._rebuild_after_debounce())
+
+    async def _rebuild_after_debounce(self):
+        while True:
+            await asyncio.sleep(self.debounce_seconds)
+            with self._lock:
+                generation = self.generation
+            try:
+                await self.rebuild()
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                snapshot_logger.exception("Catalog snapshot rebuild failed; serving from the database until the next write")
+                return
+            with self._lock:
+                if generation == self.generation:
+                    self.dirty = False
+                    return
+            # Written to during the build, so the files are already behind; go around again
+
+    async def rebuild(self):
+        """Build the body and publish all three files now"""
+        started = perf_counter()
+        body, version = await self.build()
+        await anyio.to_thread.run_sync(self._publish, body, version)  # Compression is CPU-bound; keep it off the event loop
+        with self._lock:
+            self.builds += 1
+            self.last_build_ms = round((perf_counter() - started) * 1000, 2)
+
+    def _publish(self, body: bytes, version: int):
+        contents = {
+            "br": brotli.compress(body, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY),
+            "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+            None: body,
+        }
+        name = f"{version:020d}-{hashlib.sha256(body).hexdigest()[:16]}"
+        target = self.directory / name
+        tmp_dir = self.directory / f".build-{uuid.uuid4().hex}"
+        tmp_dir.mkdir(parents=True)
+        try:
+            for encoding, content in contents.items():
+                (tmp_dir / self.path(name, encoding).name).write_bytes(content)
+            # Readers see the whole build or none of it. If another worker already published this body, keep theirs
+            try:
+                os.replace(tmp_dir, target)
+            except OSError:
+                if not target.is_dir():
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.discard(self.versions()[:-KEPT_VERSIONS])
+
+    def discard(self, names: Iterable[str]):
+        """Delete published builds (on Windows, one whose file is still being sent stays until a later call)"""
+        for name in names:
+            shutil.rmtree(self.directory / name, ignore_errors=True)
+
+    def response(self, request: Request, etag_matches: Callable[[Request, str], bool]) -> Response | None:
+        """The best encoding the client accepts as a file response (or 304), or None if the files can't be used"""
+        if not self.enabled or self.dirty:
+            return None
+        versions = self.versions()
+        if not versions:
+            return None
+        for encoding in accepted_encodings(request.headers.get("accept-encoding", "")):
+            path = self.path(versions[-1], encoding)
+            try:
+                stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue  # Pruned by a newer build since it was listed; the caller falls back to the database
+            with self._lock:
+                self.served += 1
+            # Every rebuild changes the mtime, and each encoding has its own size, so this is unique per build
+            headers = {
+                "ETag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+                "Cache-Control": "no-cache",
+                "Vary": "Accept-Encoding",
+            }
+            if encoding is not None:
+                headers["Content-Encoding"] = encoding
+            if self.version_header is not None:
+                headers[self.version_header] = str(self.version_of(versions[-1]))
+            if etag_matches(request, headers["ETag"]):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            # Sent from the file in chunks (no JSON encoding or compression per request)
+            return FileResponse(path, media_type="application/json", headers=headers, stat_result=stat_result)
+        return None
+
+    def stats(self) -> dict:
+        versions = self.versions()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "dirty": self.dirty,
+                "builds": self.builds,
+                "failures": self.failures,
+                "served": self.served,
+                "last_build_ms": self.last_build_ms,
+                "version": self.version_of(versions[-1]) if versions else None,
+            }
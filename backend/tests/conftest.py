@@ -4,8 +4,12 @@ Pytest configuration and fixtures for backend tests.
 
 import os
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, Session, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.testclient import TestClient
 
 # Set test environment
@@ -14,38 +18,99 @@ os.environ["SECRET_KEY"] = "test-secret-key-for-testing-only"
 os.environ["ALGORITHM"] = "HS256"
 os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "30"
 
+import backend.database
 from backend.main import app
-from backend.database import get_session
+from backend.cache import catalog_cache, principal_cache
+from backend.database import get_session, primary_pins
+from backend.facets import facet_counts
+from backend.images import image_processor
 from backend.models import User, Item
+from backend.routes.items import catalog_snapshot
+from backend.search import initialize_search_index
 from backend.security import get_password_hash
 
 
+@pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio, which is what uvicorn uses."""
+    return "asyncio"
+
+
+@pytest.fixture(name="db_path")
+def db_path_fixture(tmp_path):
+    """Fresh SQLite database file per test, shared by the sync fixtures and the async app engine."""
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    initialize_search_index(engine)
+    engine.dispose()
+    return path
+
+
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(db_path):
     """Create a fresh database session for each test."""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    SQLModel.metadata.create_all(engine)
-    
+    engine = create_engine(f"sqlite:///{db_path}")
     with Session(engine) as session:
         yield session
+    engine.dispose()
+
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(db_path):
+    """Async engine the app uses during the test."""
+    # NullPool: TestClient may run each request on a new event loop, so connections must not be reused across them
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    yield engine
+    engine.sync_engine.dispose()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(async_engine, monkeypatch, tmp_path):
     """Create a test client with database session override."""
-    def get_session_override():
-        return session
+    async def get_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
     
     app.dependency_overrides[get_session] = get_session_override
+    # Read-only endpoints open their sessions through open_read_session(); no replica unless a test sets one
+    monkeypatch.setattr(backend.database, "async_engine", async_engine)
+    monkeypatch.setattr(backend.database, "async_read_engine", async_engine)
+    primary_pins.clear()
+    catalog_cache.invalidate()  # Cached responses belong to the previous test's database
+    catalog_cache.clear()
+    principal_cache.clear()  # Tokens from an earlier test can be byte-identical but name a different database's user
+    facet_counts.clear()  # Counted from the previous test's database
+    image_processor.forget_failures()
+    # Snapshot files would be another test's (or a dev server's) catalog
+    monkeypatch.setattr(catalog_snapshot, "directory", tmp_path / "catalog-snapshot")
+    monkeypatch.setattr(catalog_snapshot, "dirty", False)
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="count_queries")
+def count_queries_fixture(async_engine):
+    """Context manager that records every SQL statement the app's engine executes inside the block."""
+    engine = async_engine.sync_engine
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
+
 @pytest.fixture(name="test_user")
 def test_user_fixture(session: Session):
     """Create a test user."""
@@ -2,10 +2,16 @@
 Tests for authentication endpoints.
 """
 
+import asyncio
+import jwt
+import time
 import pytest
+from datetime import timedelta
 from fastapi.testclient import TestClient
 from sqlmodel import Session
-from backend.models import User
+from backend.models import User, Item
+from backend.cache import principal_cache
+from backend.security import PasswordHashPool, PasswordHasherBusy, create_access_token, password_hash_pool
 
 
 def test_signup_success(client: TestClient, session: Session):
@@ -120,3 +126,125 @@ def test_admin_user_metadata(client: TestClient, admin_user: User):
     assert response.status_code == 200
     data = response.json()
     assert data["user"]["is_admin"] is True
+
+
+def test_login_rejected_when_hashing_pool_full(client: TestClient, test_user: User, monkeypatch):
+    """Test that login sheds load with a 503 once the bcrypt pool is saturated."""
+    monkeypatch.setattr(password_hash_pool, "max_pending", 0)
+    response = client.post(
+        "/login",
+        data={"username": test_user.email, "password": "TestPass1!"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.anyio
+async def test_password_hash_pool_caps_pending_jobs():
+    """Test that the pool runs jobs in worker processes and rejects work past max_pending."""
+    pool = PasswordHashPool(workers=1, max_pending=1)
+    try:
+        results = await asyncio.gather(pool.run(pow, 2, 10), pool.run(pow, 2, 3), return_exceptions=True)
+        assert results[0] == 1024
+        assert isinstance(results[1], PasswordHasherBusy)
+
+        stats = pool.stats()
+        assert stats["completed"] == 1
+        assert stats["rejected"] == 1
+        assert stats["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_bcrypt_stats_admin_only(client: TestClient, auth_token: str, admin_token: str):
+    """Test that hashing pool metrics are exposed to admins only."""
+    response = client.get("/internal/bcrypt", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 403
+
+    response = client.get("/internal/bcrypt", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert {"workers", "in_flight", "queue_depth", "completed", "rejected"} <= response.json().keys()
+
+
+def test_principal_cache_skips_user_lookup(client: TestClient, auth_token: str, count_queries):
+    """Test that repeated requests with the same token resolve the user without a database query."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/secure-data", headers=headers).status_code == 200
+
+    with count_queries() as statements:
+        response = client.get("/secure-data", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "testuser@ufl.edu"
+    assert len(statements) == 0
+
+
+def test_principal_cache_invalidate_user(client: TestClient, session: Session, test_user: User, auth_token: str):
+    """Test that invalidating a user makes the next request see their updated admin flag."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/secure-data", headers=headers).json()["is_admin"] is False
+
+    test_user.is_admin = True
+    session.add(test_user)
+    session.commit()
+    assert client.get("/secure-data", headers=headers).json()["is_admin"] is False  # Still cached
+
+    principal_cache.invalidate_user(test_user.id)
+    assert client.get("/secure-data", headers=headers).json()["is_admin"] is True
+
+
+def test_principal_cache_respects_token_expiry(client: TestClient, test_user: User):
+    """Test that a cached principal is never served past its token's expiry."""
+    token = create_access_token(subject=test_user.username, expires_delta=timedelta(seconds=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/secure-data", headers=headers).status_code == 200
+
+    time.sleep(1.1)
+    assert client.get("/secure-data", headers=headers).status_code == 401
+
+
+@pytest.fixture(name="self_contained_tokens")
+def self_contained_tokens_fixture(monkeypatch):
+    """Issue self-contained tokens from /login for the duration of a test."""
+    monkeypatch.setattr("backend.routes.auth.SELF_CONTAINED_TOKENS", True)
+
+
+def test_self_contained_token_skips_user_lookup(client: TestClient, session: Session, test_user: User, self_contained_tokens, count_queries):
+    """Test that a self-contained token authorizes a write with no user query."""
+    token = client.post("/login", data={"username": test_user.email, "password": "TestPass1!"}).json()["access_token"]
+    claims = jwt.decode(token, options={"verify_signature": False})
+    assert claims["uid"] == test_user.id
+    assert claims["adm"] is False
+
+    item = Item(title="Claims Item", price=10.0, category="school", is_active=True, seller_id=test_user.id)
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+
+    with count_queries() as statements:
+        response = client.put(f"/items/{item.id}/mark-sold", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert not any('FROM user' in statement for statement in statements)
+
+
+def test_self_contained_token_loses_admin_rights_on_demotion(
+    client: TestClient, session: Session, admin_user: User, test_user: User, self_contained_tokens
+):
+    """Test that a demoted admin's old token still carrying the admin claim gets no admin rights."""
+    token = client.post("/login", data={"username": admin_user.email, "password": "AdminPass1!"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/internal/cache", headers=headers).status_code == 200
+    item = Item(title="Someone Else's", price=10.0, category="school", is_active=True, seller_id=test_user.id)
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+
+    admin_user.is_admin = False  # Changed directly in the database, as the API has no endpoint for it
+    session.add(admin_user)
+    session.commit()
+    assert jwt.decode(token, options={"verify_signature": False})["adm"] is True
+    assert client.get("/internal/cache", headers=headers).status_code == 403
+    assert client.put(f"/items/{item.id}/mark-sold", headers=headers).status_code == 403
+    assert client.delete(f"/items/{item.id}", headers=headers).status_code == 403
+    response = client.put("/items/bulk/mark-sold", json={"ids": [item.id]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["affected"] == 0
@@ -0,0 +1,42 @@
+"""
+Tests for the in-process catalog cache.
+"""
+
+import time
+from backend.cache import CatalogCache
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted once the cache is full."""
+    cache = CatalogCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1, cache.version)
+    cache.set("b", 2, cache.version)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3, cache.version)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    cache = CatalogCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1, cache.version)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_invalidate_bumps_version():
+    """Test that invalidation clears entries and rejects results computed before it."""
+    cache = CatalogCache(max_entries=10, ttl_seconds=60)
+    version = cache.version
+    cache.set("a", 1, version)
+    cache.invalidate()
+
+    assert cache.version == version + 1
+    assert cache.get("a") is None
+    cache.set("a", "stale", version)  # Computed before the write, must not be stored
+    assert cache.get("a") is None
@@ -0,0 +1,155 @@
+"""
+Tests for the item change log and GET /items/changes.
+"""
+
+import asyncio
+import shutil
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, select
+import backend.database
+from backend.models import Item, ItemChange, User, utc_now
+from backend.routes.items import catalog_snapshot
+
+
+def test_changes_report_latest_state_per_item(client: TestClient, auth_token: str):
+    """Test that creates, sales and deletes are logged in order and each item is reported once, at its latest change."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/items/changes").json() == {"changes": [], "next_since": 0, "has_more": False}
+
+    def create(title: str) -> int:
+        return client.post("/items", json={"title": title, "price": 10.0, "category": "school"}, headers=headers).json()["id"]
+
+    first, second, third = create("First"), create("Second"), create("Third")
+    client.put(f"/items/{first}/mark-sold", headers=headers)
+    client.delete(f"/items/{second}", headers=headers)
+
+    body = client.get("/items/changes", params={"since": 0}).json()
+    assert [(change["seq"], change["op"], change["item_id"]) for change in body["changes"]] == [
+        (3, "insert", third), (4, "update", first), (5, "delete", second)
+    ]
+    assert body["changes"][0]["item"]["title"] == "Third"
+    assert body["changes"][1]["item"]["is_active"] is False
+    assert body["changes"][2]["item"] is None
+    assert body["next_since"] == 5 and body["has_more"] is False
+
+    body = client.get("/items/changes", params={"since": 4}).json()
+    assert [change["item_id"] for change in body["changes"]] == [second]
+    assert client.get("/items/changes").json()["next_since"] == 5
+
+    page = client.get("/items/changes", params={"since": 0, "limit": 2}).json()
+    assert [change["seq"] for change in page["changes"]] == [3, 4] and page["has_more"] is True
+    page = client.get("/items/changes", params={"since": page["next_since"], "limit": 2}).json()
+    assert [change["seq"] for change in page["changes"]] == [5] and page["has_more"] is False
+
+
+def test_bulk_writes_logged(client: TestClient, auth_token: str, session: Session):
+    """Test that bulk create, mark-sold and delete log one change per affected item."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    payloads = [{"title": f"Bulk {i}", "price": 5.0 + i, "category": "tickets"} for i in range(4)]
+    ids = [item["id"] for item in client.post("/items/bulk", json=payloads, headers=headers).json()["created"]]
+    client.put("/items/bulk/mark-sold", json={"ids": ids[:2]}, headers=headers)
+    client.post("/items/bulk/delete", json={"ids": ids[1:3]}, headers=headers)
+
+    logged = session.exec(select(ItemChange.op, ItemChange.item_id).order_by(ItemChange.seq)).all()
+    assert logged == [
+        *(("insert", item_id) for item_id in ids),
+        ("update", ids[0]), ("update", ids[1]),
+        ("delete", ids[1]), ("delete", ids[2]),
+    ]
+    body = client.get("/items/changes", params={"since": 0}).json()
+    assert {change["item_id"]: change["op"] for change in body["changes"]} == {
+        ids[0]: "update", ids[1]: "delete", ids[2]: "delete", ids[3]: "insert"
+    }
+
+
+def test_active_items_tell_where_to_poll_from(client: TestClient, session: Session, test_user: User, auth_token: str, monkeypatch):
+    """Test that /items/active reports the change seq its body is current to, even when served from an older snapshot."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/items/active", params={"limit": 10}).headers["x-changes-since"] == "0"
+    for title in ("Lamp", "Desk"):
+        client.post("/items", json={"title": title, "price": 10.0, "category": "living"}, headers=headers)
+    assert client.get("/items/active", params={"limit": 10}).headers["x-changes-since"] == "2"
+    asyncio.run(catalog_snapshot.rebuild())
+    monkeypatch.setattr(catalog_snapshot, "dirty", False)  # Built without waiting for the debounce
+
+    # Listed through another worker: this process's snapshot stays at seq 2 while the log moves on to 3
+    item = Item(title="Chair", price=15.0, category="living", seller_id=test_user.id)
+    session.add(item)
+    session.commit()
+    session.add(ItemChange(item_id=item.id, op="insert"))
+    session.commit()
+
+    response = client.get("/items/active")
+    assert response.headers["content-encoding"] in ("br", "gzip")  # From the snapshot
+    assert [listed["title"] for listed in response.json()] == ["Desk", "Lamp"]
+    since = response.headers["x-changes-since"]
+    assert since == "2"
+    changes = client.get("/items/changes", params={"since": since}).json()["changes"]
+    assert [change["item"]["title"] for change in changes] == ["Chair"]
+
+
+def test_cursor_ahead_of_replica_checked_on_primary(client: TestClient, auth_token: str, db_path, tmp_path, monkeypatch):
+    """Test that a cursor the lagging replica hasn't reached yet is answered from the primary instead of getting 410."""
+    # Replica is a snapshot of the primary taken before the write, i.e. one that hasn't caught up yet
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(db_path, replica_path)
+    replica = create_async_engine(f"sqlite+aiosqlite:///{replica_path}", poolclass=NullPool)
+    monkeypatch.setattr(backend.database, "async_read_engine", replica)
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for title in ("Lamp", "Desk"):
+        client.post("/items", json={"title": title, "price": 10.0, "category": "living"}, headers=headers)
+    assert client.get("/items/changes").json()["next_since"] == 0  # Anonymous, so from the replica
+
+    body = client.get("/items/changes", params={"since": 1}).json()  # e.g. from a snapshot built on the primary
+    assert [change["item"]["title"] for change in body["changes"]] == ["Desk"]
+    assert body["next_since"] == 2
+    assert client.get("/items/changes", params={"since": 2}).json()["changes"] == []
+    assert client.get("/items/changes", params={"since": 99}).status_code == 410  # Past the primary too
+    replica.sync_engine.dispose()
+
+
+def test_compaction_expires_old_cursors(client: TestClient, session: Session, admin_token: str):
+    """Test that compaction drops old changes but keeps the newest, and cursors before the kept range get 410."""
+    old = utc_now() - timedelta(days=30)
+    session.add_all([ItemChange(item_id=item_id, op="insert", changed_at=old) for item_id in (1, 2, 3)])
+    session.add(ItemChange(item_id=4, op="insert"))
+    session.commit()
+
+    response = client.post("/internal/changes/compact", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json() == {"removed": 3}
+    assert session.exec(select(ItemChange.seq)).all() == [4]
+
+    assert client.get("/items/changes", params={"since": 1}).status_code == 410
+    assert client.get("/items/changes", params={"since": 3}).status_code == 200
+    assert client.get("/items/changes", params={"since": 4}).json()["changes"] == []
+    assert client.get("/items/changes", params={"since": 99}).status_code == 410  # Cursor from another database
+
+
+def test_compaction_keeps_newest_change(client: TestClient, session: Session, admin_token: str):
+    """Test that seq keeps increasing after compaction, even when every change is old."""
+    old = utc_now() - timedelta(days=30)
+    session.add_all([ItemChange(item_id=item_id, op="insert", changed_at=old) for item_id in (1, 2)])
+    session.commit()
+    client.post("/internal/changes/compact", headers={"Authorization": f"Bearer {admin_token}"})
+    assert session.exec(select(ItemChange.seq)).all() == [2]
+
+    session.add(ItemChange(item_id=3, op="insert"))
+    session.commit()
+    assert session.exec(select(ItemChange.seq).where(ItemChange.item_id == 3)).one() == 3
+
+
+def test_compaction_removes_only_a_prefix(client: TestClient, session: Session, admin_token: str):
+    """Test that a change stamped earlier than a lower seq doesn't let compaction leave a gap in the log."""
+    old, now = utc_now() - timedelta(days=30), utc_now()
+    # Writers stamp changed_at before taking the log lock, so a later seq can carry an earlier time
+    session.add_all([ItemChange(item_id=item_id, op="insert", changed_at=changed_at) for item_id, changed_at in ((1, old), (2, now), (3, old), (4, now))])
+    session.commit()
+
+    response = client.post("/internal/changes/compact", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json() == {"removed": 3}
+    assert session.exec(select(ItemChange.seq)).all() == [4]
+    assert client.get("/items/changes", params={"since": 1}).status_code == 410
@@ -0,0 +1,159 @@
+"""
+Tests for database engine configuration and connection pool metrics.
+"""
+
+import shutil
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import create_engine
+from fastapi.testclient import TestClient
+import backend.database
+from backend.database import SQLITE_PRAGMAS, PrimaryPins, add_missing_columns, configure_sqlite, pool_options, pool_stats
+from backend.models import Item, User
+
+
+def test_pool_options_presets_and_overrides(monkeypatch):
+    """Test backend presets and DB_POOL_* environment overrides."""
+    postgres = pool_options("postgresql://user:pw@localhost/db")
+    assert postgres["pool_pre_ping"] is True
+    assert postgres["pool_size"] == 10
+
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    overridden = pool_options("postgresql://user:pw@localhost/db")
+    assert overridden["pool_size"] == 3
+    assert overridden["pool_pre_ping"] is False
+
+    assert pool_options("sqlite:///:memory:") == {}
+
+
+def test_pool_stats_track_checkouts_and_timeouts(tmp_path, monkeypatch):
+    """Test that checked-out connections, overflow, checkout waits and timeouts are reported."""
+    monkeypatch.setenv("DB_POOL_SIZE", "1")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "1")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **pool_options(f"sqlite:///{tmp_path / 'pool.db'}"))
+
+    first = engine.connect()
+    second = engine.connect()
+    first.execute(text("SELECT 1"))
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["max_overflow"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    first.close()
+    second.close()
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["timeouts"] == 1
+    assert stats["checkout_wait"]["count"] == 3
+    assert stats["checkout_wait"]["max_seconds"] >= 0.05
+    assert stats["checkout_wait"]["buckets"]["+Inf"] == 3
+
+    engine.dispose()  # The rebuilt pool keeps its settings and metrics
+    engine.connect().close()
+    stats = pool_stats(engine)
+    assert stats["max_overflow"] == 1
+    assert stats["checkout_wait"]["count"] == 4
+    engine.dispose()
+
+
+def test_db_pool_stats_admin_only(client: TestClient, auth_token: str, admin_token: str):
+    """Test that pool statistics are exposed to admins only."""
+    response = client.get("/internal/db-pool", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 403
+
+    response = client.get("/internal/db-pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert "pool_class" in response.json()
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    """Test that file-based SQLite connections get the production pragmas."""
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    engine = create_engine(url, **pool_options(url))
+    configure_sqlite(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == SQLITE_PRAGMAS["cache_size"]
+    engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_sqlite_profile_pragmas_async(tmp_path):
+    """Test that the pragmas are also applied through the aiosqlite driver."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}")
+    configure_sqlite(engine.sync_engine)
+
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+    await engine.dispose()
+
+
+def test_primary_pins_expire():
+    """Test that a write pins its author to the primary only for the read-your-writes window."""
+    pins = PrimaryPins(window_seconds=60)
+    assert not pins.has_active_pins()
+    assert not pins.replica_may_lag()
+
+    pins.pin("alice")
+    assert pins.is_pinned("alice")
+    assert not pins.is_pinned("bob")
+    assert not pins.is_pinned(None)
+    assert pins.replica_may_lag()
+
+    expired = PrimaryPins(window_seconds=0)
+    expired.pin("alice")
+    assert not expired.is_pinned("alice")
+    assert not expired.replica_may_lag()
+
+
+def test_reads_use_replica_except_for_recent_writers(client: TestClient, test_user: User, auth_token: str, db_path, tmp_path, monkeypatch):
+    """Test that reads go to the replica, but a user who just wrote reads the primary."""
+    # Replica is a snapshot of the primary taken before the write, i.e. one that hasn't caught up yet
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(db_path, replica_path)
+    replica = create_async_engine(f"sqlite+aiosqlite:///{replica_path}", poolclass=NullPool)
+    monkeypatch.setattr(backend.database, "async_read_engine", replica)
+
+    response = client.post(
+        "/items",
+        json={"title": "Fresh Listing", "price": 10.0, "category": "school"},
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert response.status_code == 201
+
+    # Anonymous readers hit the lagging replica
+    assert client.get("/items/active").json() == []
+    # The author sees their own listing straight away, not the replica's answer from the response cache
+    own_view = client.get("/items/active", headers={"Authorization": f"Bearer {auth_token}"})
+    assert [item["title"] for item in own_view.json()] == ["Fresh Listing"]
+    replica.sync_engine.dispose()
+
+
+def test_add_missing_columns(tmp_path):
+    """Test that columns added to a model are added to an existing table."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE item (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description VARCHAR, seller_id INTEGER NOT NULL, "
+            "price FLOAT NOT NULL, category VARCHAR NOT NULL, is_active BOOLEAN NOT NULL, image VARCHAR)"
+        ))
+        conn.execute(text("INSERT INTO item (title, seller_id, price, category, is_active) VALUES ('Old', 1, 1.0, 'school', 1)"))
+
+    add_missing_columns(engine, Item.__table__)
+    add_missing_columns(engine, Item.__table__)  # Idempotent
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT created_at FROM item")).all() == [(None,)]
+    engine.dispose()
@@ -0,0 +1,94 @@
+"""
+Tests for the incrementally maintained category facets behind GET /items/facets.
+"""
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from backend.facets import facet_counts
+from backend.models import Item, User
+
+
+def add_item(session: Session, seller: User, category: str, price: float, is_active: bool = True) -> Item:
+    item = Item(title=f"{category} {price}", price=price, category=category, seller_id=seller.id, is_active=is_active)
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def test_facets_recounted_on_first_read(client: TestClient, session: Session, test_user: User):
+    """Test that the first read counts active items and price ranges per category, ignoring sold items."""
+    for price in (5.0, 20.0, 12.5):
+        add_item(session, test_user, "school", price)
+    add_item(session, test_user, "tickets", 40.0)
+    add_item(session, test_user, "living", 99.0, is_active=False)
+
+    response = client.get("/items/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 4,
+        "categories": {
+            "school": {"count": 3, "min_price": 5.0, "max_price": 20.0},
+            "tickets": {"count": 1, "min_price": 40.0, "max_price": 40.0},
+        },
+    }
+    assert facet_counts.stats()["recounts"] == 1
+
+    response = client.get("/items/facets", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+def test_writes_update_facets_without_queries(client: TestClient, session: Session, test_user: User, auth_token: str, count_queries):
+    """Test that creating, selling and deleting items adjusts the counts in memory, so reads run no SQL."""
+    add_item(session, test_user, "school", 10.0)
+    client.get("/items/facets")
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    created = client.post("/items", json={"title": "Hoodie", "price": 30.0, "category": "apparel"}, headers=headers).json()
+    cheap = client.post("/items", json={"title": "Pencil", "price": 2.0, "category": "school"}, headers=headers).json()
+    mid = client.post("/items", json={"title": "Ruler", "price": 6.0, "category": "school"}, headers=headers).json()
+    client.put(f"/items/{mid['id']}/mark-sold", headers=headers)
+    client.delete(f"/items/{created['id']}", headers=headers)
+
+    with count_queries() as statements:
+        response = client.get("/items/facets")
+    assert statements == []
+    assert response.json()["categories"] == {"school": {"count": 2, "min_price": 2.0, "max_price": 10.0}}
+
+    # Selling the cheapest item leaves the minimum unknown until one indexed lookup refreshes it
+    client.put(f"/items/{cheap['id']}/mark-sold", headers=headers)
+    with count_queries() as statements:
+        response = client.get("/items/facets")
+    assert len(statements) == 1
+    assert response.json()["categories"] == {"school": {"count": 1, "min_price": 10.0, "max_price": 10.0}}
+    assert facet_counts.stats()["recounts"] == 1
+
+
+def test_bulk_writes_update_facets(client: TestClient, session: Session, test_user: User, auth_token: str):
+    """Test that bulk create, mark-sold and delete adjust the counts by the rows they touched."""
+    client.get("/items/facets")
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    payloads = [{"title": f"Ticket {i}", "price": 10.0 + i, "category": "tickets"} for i in range(5)]
+    payloads += [{"title": "Lamp", "price": 15.0, "category": "living"}, {"title": "Sold Desk", "price": 50.0, "category": "living", "is_active": False}]
+    ids = [item["id"] for item in client.post("/items/bulk", json=payloads, headers=headers).json()["created"]]
+    assert client.get("/items/facets").json()["total"] == 6
+
+    client.put("/items/bulk/mark-sold", json={"ids": ids[:2]}, headers=headers)
+    client.post("/items/bulk/delete", json={"category": "living"}, headers=headers)
+    response = client.get("/items/facets")
+    assert response.json() == {"total": 3, "categories": {"tickets": {"count": 3, "min_price": 12.0, "max_price": 14.0}}}
+    assert facet_counts.stats()["recounts"] == 1
+
+
+def test_reconcile_picks_up_outside_writes(client: TestClient, session: Session, test_user: User, monkeypatch):
+    """Test that the periodic recount corrects counts for writes this process never saw (other workers, scripts)."""
+    add_item(session, test_user, "services", 25.0)
+    assert client.get("/items/facets").json()["total"] == 1
+
+    add_item(session, test_user, "services", 35.0)  # Written directly, as another worker would
+    assert client.get("/items/facets").json()["total"] == 1
+
+    monkeypatch.setattr(facet_counts, "reconcile_seconds", 0)
+    response = client.get("/items/facets")
+    assert response.json()["categories"]["services"] == {"count": 2, "min_price": 25.0, "max_price": 35.0}
+    assert facet_counts.stats()["corrections"] == 1
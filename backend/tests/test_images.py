@@ -0,0 +1,165 @@
+"""
+Tests for item image upload, variant generation and serving.
+"""
+
+import hashlib
+import io
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session
+import backend.images
+from backend.images import image_processor, make_variants, variant_path
+from backend.models import Item, User
+from backend.security import get_password_hash
+
+
+@pytest.fixture(autouse=True)
+def image_storage(tmp_path, monkeypatch):
+    """Keep each test's uploads in its own directory."""
+    root = tmp_path / "media"
+    monkeypatch.setattr(backend.images, "IMAGE_STORAGE_DIR", root)
+    return root
+
+
+def png_bytes(size=(800, 600), color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_upload_stores_by_hash_and_serves_with_cache_headers(client: TestClient, session: Session, auth_token: str, test_item: Item):
+    """Test that an upload is stored under its SHA-256, recorded on the item and served as an immutable file."""
+    body = png_bytes()
+    image_hash = hashlib.sha256(body).hexdigest()
+    response = client.post(
+        f"/items/{test_item.id}/image",
+        content=body,
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "image/png"}
+    )
+    assert response.status_code == 200
+    assert response.json()["image_hash"] == image_hash
+    assert response.json()["image"] == f"/images/{image_hash}"
+    session.refresh(test_item)
+    assert test_item.image_hash == image_hash
+
+    response = client.get(f"/images/{image_hash}")
+    assert response.status_code == 200
+    assert response.content == body
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{image_hash}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    response = client.get(f"/images/{image_hash}", headers={"If-None-Match": f'"{image_hash}"'})
+    assert response.status_code == 304
+
+    response = client.get(f"/images/{image_hash}", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == body[:10]
+
+
+def test_variants_generated_in_background(client: TestClient, auth_token: str, test_item: Item):
+    """Test that thumb and card variants appear after the upload and fit their bounding boxes."""
+    response = client.post(
+        f"/items/{test_item.id}/image",
+        content=png_bytes(),
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "image/png"}
+    )
+    image_hash = response.json()["image_hash"]
+    image_processor.wait(timeout=60)
+
+    for variant, box in (("thumb", (160, 160)), ("card", (480, 480))):
+        response = client.get(f"/images/{image_hash}/{variant}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert response.headers["etag"] == f'"{image_hash}-{variant}"'
+        assert "immutable" in response.headers["cache-control"]
+        width, height = Image.open(io.BytesIO(response.content)).size
+        assert width <= box[0] and height <= box[1]
+        assert width / height == pytest.approx(800 / 600, rel=0.02)
+
+
+def test_variant_falls_back_to_original(client: TestClient, image_storage):
+    """Test that a variant URL serves the original, briefly cached, until the variant exists."""
+    body = png_bytes()
+    image_hash = hashlib.sha256(body).hexdigest()
+    original = backend.images.original_path(image_hash, "png")
+    original.parent.mkdir(parents=True)
+    original.write_bytes(body)
+
+    response = client.get(f"/images/{image_hash}/card")
+    assert response.status_code == 200
+    assert response.content == body
+    assert "immutable" not in response.headers["cache-control"]
+
+    make_variants(str(original), image_hash, str(image_storage))
+    assert variant_path(image_hash, "card").is_file()
+    image_processor.wait(timeout=60)  # The fallback also queued a job for it
+
+
+def test_undecodable_original_backs_off(client: TestClient, monkeypatch):
+    """Test that an original whose variants fail is retried with backoff, not decoded again on every request."""
+    body = png_bytes()[:300]  # Valid header, truncated pixel data
+    image_hash = hashlib.sha256(body).hexdigest()
+    original = backend.images.original_path(image_hash, "png")
+    original.parent.mkdir(parents=True)
+    original.write_bytes(body)
+    monkeypatch.setattr(image_processor, "max_attempts", 2)
+    failed = image_processor.stats()["failed"]
+
+    def request_card():
+        response = client.get(f"/images/{image_hash}/card")
+        assert response.status_code == 200
+        assert response.content == body
+        image_processor.wait(timeout=60)
+
+    request_card()
+    assert image_processor.stats()["failed"] == failed + 1
+    for _ in range(3):
+        request_card()  # Backing off: nothing is queued
+    assert image_processor.stats()["failed"] == failed + 1
+
+    monkeypatch.setattr(image_processor, "retry_seconds", 0)
+    request_card()
+    assert image_processor.stats()["failed"] == failed + 2
+    request_card()  # Out of attempts
+    assert image_processor.stats()["failed"] == failed + 2
+    assert image_processor.stats()["abandoned_hashes"] == 1
+
+
+def test_upload_rejects_non_images_and_oversized_files(client: TestClient, auth_token: str, test_item: Item, monkeypatch):
+    """Test that non-image bodies get 415 and bodies over IMAGE_MAX_BYTES get 413, leaving nothing behind."""
+    headers = {"Authorization": f"Bearer {auth_token}", "Content-Type": "image/png"}
+    response = client.post(f"/items/{test_item.id}/image", content=b"not an image" * 100, headers=headers)
+    assert response.status_code == 415
+
+    monkeypatch.setattr("backend.routes.items.IMAGE_MAX_BYTES", 1000)
+    body = png_bytes(color=(10, 20, 30)) + bytes(1000)  # Trailing bytes are ignored by PNG readers
+    response = client.post(f"/items/{test_item.id}/image", content=body, headers=headers)
+    assert response.status_code == 413  # Rejected from Content-Length before reading the body
+    chunks = (body[i:i + 256] for i in range(0, len(body), 256))
+    response = client.post(f"/items/{test_item.id}/image", content=chunks, headers=headers)
+    assert response.status_code == 413  # Chunked upload, stopped once the limit is crossed
+
+    assert not any((backend.images.IMAGE_STORAGE_DIR / "tmp").iterdir())
+    assert not (backend.images.IMAGE_STORAGE_DIR / "originals").exists()
+
+
+def test_upload_requires_owner(client: TestClient, session: Session, admin_user, test_item: Item):
+    """Test that only the item's owner or an admin can set its image."""
+    response = client.post(f"/items/{test_item.id}/image", content=png_bytes())
+    assert response.status_code == 401
+
+    other = User(username="other", email="other@ufl.edu", hashed_password=get_password_hash("OtherPass1!"))
+    session.add(other)
+    session.commit()
+    token = client.post("/login", data={"username": "other@ufl.edu", "password": "OtherPass1!"}).json()["access_token"]
+    response = client.post(
+        f"/items/{test_item.id}/image", content=png_bytes(), headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+    response = client.get("/images/" + "0" * 64)
+    assert response.status_code == 404
+    response = client.get("/images/../../etc/passwd")
+    assert response.status_code == 404
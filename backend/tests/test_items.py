@@ -2,10 +2,16 @@
 Tests for item endpoints.
 """
 
+import asyncio
+import httpx
+import json
 import pytest
+from datetime import datetime, timedelta, timezone
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select, update
+from backend.main import app
 from backend.models import User, Item
+from backend.routes.items import encode_cursor
 
 
 def test_get_active_items_no_auth(client: TestClient, test_item: Item):
@@ -255,3 +261,400 @@ def test_delete_nonexistent_item(client: TestClient, auth_token: str):
         headers={"Authorization": f"Bearer {auth_token}"}
     )
     assert response.status_code == 404
+
+
+def _create_items(session: Session, seller: User, specs: list[tuple[str, float, str]]):
+    """Insert (title, price, category) items for the given seller."""
+    for title, price, category in specs:
+        session.add(Item(title=title, price=price, category=category, is_active=True, seller_id=seller.id))
+    session.commit()
+
+
+def test_get_active_items_filter_by_category_and_price(client: TestClient, session: Session, test_user: User):
+    """Test server-side category and price range filtering."""
+    _create_items(session, test_user, [
+        ("Cheap Book", 5.0, "school"),
+        ("Mid Book", 20.0, "school"),
+        ("Pricey Book", 80.0, "school"),
+        ("Hoodie", 20.0, "apparel"),
+    ])
+
+    response = client.get("/items/active", params={"category": "school", "min_price": 10, "max_price": 50})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Mid Book"]
+
+
+def test_get_active_items_sorting(client: TestClient, session: Session, test_user: User):
+    """Test the supported server-side sort orders."""
+    _create_items(session, test_user, [
+        ("Bravo", 30.0, "school"),
+        ("Alpha", 10.0, "school"),
+        ("Charlie", 20.0, "school"),
+    ])
+
+    titles = lambda sort: [i["title"] for i in client.get("/items/active", params={"sort": sort}).json()]
+    assert titles("title") == ["Alpha", "Bravo", "Charlie"]
+    assert titles("price_asc") == ["Alpha", "Charlie", "Bravo"]
+    assert titles("price_desc") == ["Bravo", "Charlie", "Alpha"]
+    assert titles("newest") == ["Charlie", "Alpha", "Bravo"]
+
+
+def test_get_active_items_keyset_pagination(client: TestClient, session: Session, test_user: User):
+    """Test walking every page with the opaque cursor, including ties on the sort value."""
+    _create_items(session, test_user, [(f"Item {i}", float(i % 3), "school") for i in range(7)])
+
+    seen = []
+    params = {"sort": "price_asc", "limit": 3}
+    while True:
+        response = client.get("/items/active", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"sort": "price_asc", "limit": 3, "cursor": cursor}
+
+    assert len(seen) == 7
+    assert len({item["id"] for item in seen}) == 7
+    assert [item["price"] for item in seen] == sorted(item["price"] for item in seen)
+
+
+def test_get_active_items_invalid_cursor(client: TestClient, test_item: Item):
+    """Test that malformed cursors and cursors from a different sort are rejected."""
+    response = client.get("/items/active", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+    title_cursor = encode_cursor(test_item.title, test_item.id, "title")
+    response = client.get("/items/active", params={"sort": "price_asc", "cursor": title_cursor})
+    assert response.status_code == 400
+
+    # Well-formed JSON whose values don't fit the sort must not reach the database
+    for value, item_id in ((["x"], 1), ({"a": 1}, 1), ("cheap", 1), (True, 1), (9.99, True), (9.99, "1")):
+        crafted = encode_cursor(value, item_id, "price_asc")
+        response = client.get("/items/active", params={"sort": "price_asc", "cursor": crafted})
+        assert response.status_code == 400, (value, item_id)
+
+
+# Upper bound on SQL statements per item request, including the authenticated user lookup.
+# It must not depend on the number of rows involved, which is what catches N+1 query patterns.
+MAX_QUERIES_PER_REQUEST = 5
+
+
+@pytest.mark.parametrize("item_count", [1, 50])
+def test_get_active_items_query_count(client: TestClient, session: Session, test_user: User, admin_user: User, count_queries, item_count: int):
+    """Test that listing items issues a fixed number of queries regardless of catalog size."""
+    sellers = [test_user, admin_user]
+    for i in range(item_count):
+        session.add(Item(title=f"Item {i}", price=10.0, category="school", is_active=True, seller_id=sellers[i % 2].id))
+    session.commit()
+    session.expunge_all()
+
+    with count_queries() as statements:
+        response = client.get("/items/active")
+    assert response.status_code == 200
+    assert len(response.json()) == item_count
+    assert len(statements) == 1
+
+
+def test_item_write_endpoints_query_count(client: TestClient, session: Session, test_user: User, auth_token: str, count_queries):
+    """Test that create, mark-sold and delete each stay under the per-request query budget."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries() as statements:
+        response = client.post("/items", json={"title": "Budget Item", "price": 10.0, "category": "school"}, headers=headers)
+    assert response.status_code == 201
+    assert len(statements) <= MAX_QUERIES_PER_REQUEST
+    item_id = response.json()["id"]
+
+    session.expunge_all()
+    with count_queries() as statements:
+        response = client.put(f"/items/{item_id}/mark-sold", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["seller"]["email"] == test_user.email
+    assert len(statements) <= MAX_QUERIES_PER_REQUEST
+
+    session.expunge_all()
+    with count_queries() as statements:
+        response = client.delete(f"/items/{item_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(statements) <= MAX_QUERIES_PER_REQUEST
+
+
+def _post_item(client: TestClient, token: str, title: str, description: str | None = None, price: float = 10.0) -> dict:
+    """Create an item through the API so the search index is kept in sync."""
+    response = client.post(
+        "/items",
+        json={"title": title, "price": price, "category": "school", "description": description},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_search_items_matches_title_and_description(client: TestClient, auth_token: str):
+    """Test that search matches words in titles and descriptions, including prefixes."""
+    _post_item(client, auth_token, "Calculus Textbook", "Early transcendentals, barely used")
+    _post_item(client, auth_token, "Desk Lamp", "Bright LED lamp for studying calculus late")
+    _post_item(client, auth_token, "Gators Hoodie", "Size large")
+
+    titles = lambda q: sorted(i["title"] for i in client.get("/items/search", params={"q": q}).json())
+    assert titles("calculus") == ["Calculus Textbook", "Desk Lamp"]
+    assert titles("transcend") == ["Calculus Textbook"]
+    assert titles("hoodie large") == ["Gators Hoodie"]
+    assert titles("\"(*") == []
+
+
+def test_search_items_ranked_and_paginated(client: TestClient, auth_token: str):
+    """Test that the best match comes first and pages can be walked with the cursor."""
+    _post_item(client, auth_token, "Chair", "A desk chair that goes with any desk setup")
+    for i in range(4):
+        _post_item(client, auth_token, f"Desk {i}", "Wooden desk desk desk")
+
+    first = client.get("/items/search", params={"q": "desk", "limit": 3})
+    assert first.status_code == 200
+    assert len(first.json()) == 3
+    assert first.json()[0]["title"].startswith("Desk")
+    assert first.json()[0]["seller"]["email"] == "testuser@ufl.edu"
+
+    second = client.get("/items/search", params={"q": "desk", "limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert second.status_code == 200
+    assert "X-Next-Cursor" not in second.headers
+    ids = [i["id"] for i in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 5
+
+
+def test_search_index_follows_sold_and_deleted_items(client: TestClient, auth_token: str):
+    """Test that sold and deleted items drop out of search results."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sold = _post_item(client, auth_token, "Graphing Calculator")
+    deleted = _post_item(client, auth_token, "Scientific Calculator")
+    _post_item(client, auth_token, "Calculator Case")
+
+    client.put(f"/items/{sold['id']}/mark-sold", headers=headers)
+    client.delete(f"/items/{deleted['id']}", headers=headers)
+
+    results = client.get("/items/search", params={"q": "calculator"}).json()
+    assert [i["title"] for i in results] == ["Calculator Case"]
+
+
+def test_get_active_items_served_from_cache(client: TestClient, session: Session, test_item: Item, count_queries):
+    """Test that a repeated listing is answered from the catalog cache without touching the database."""
+    first = client.get("/items/active")
+    with count_queries() as statements:
+        second = client.get("/items/active")
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert len(statements) == 0
+
+
+def test_catalog_cache_invalidated_by_writes(client: TestClient, auth_token: str, test_item: Item):
+    """Test that create, mark-sold and delete each invalidate cached listings."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert len(client.get("/items/active").json()) == 1
+
+    created = _post_item(client, auth_token, "Fresh Listing")
+    assert len(client.get("/items/active").json()) == 2
+
+    client.put(f"/items/{created['id']}/mark-sold", headers=headers)
+    assert len(client.get("/items/active").json()) == 1
+
+    client.delete(f"/items/{test_item.id}", headers=headers)
+    assert client.get("/items/active").json() == []
+
+
+def test_cache_stats_admin_only(client: TestClient, auth_token: str, admin_token: str, test_item: Item):
+    """Test that cache counters are exposed to admins only."""
+    client.get("/items/active")
+    client.get("/items/active")
+
+    response = client.get("/internal/cache", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 403
+
+    response = client.get("/internal/cache", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_get_active_items_etag_not_modified(client: TestClient, test_item: Item, count_queries):
+    """Test that a matching If-None-Match gets an empty 304 without any database queries."""
+    first = client.get("/items/active")
+    etag = first.headers["ETag"]
+    assert etag.startswith('"')
+
+    with count_queries() as statements:
+        response = client.get("/items/active", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 0
+
+    # Weak and list forms of the header also match
+    assert client.get("/items/active", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/items/active", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_get_active_items_etag_changes_after_write(client: TestClient, auth_token: str, test_item: Item):
+    """Test that a stale ETag gets the fresh catalog after an item write."""
+    etag = client.get("/items/active").headers["ETag"]
+    _post_item(client, auth_token, "Another Listing")
+
+    response = client.get("/items/active", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_search_items_etag(client: TestClient, auth_token: str):
+    """Test conditional GET on search results."""
+    _post_item(client, auth_token, "Mini Fridge")
+    etag = client.get("/items/search", params={"q": "fridge"}).headers["ETag"]
+    response = client.get("/items/search", params={"q": "fridge"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_stream_active_items_ndjson(client: TestClient, session: Session, test_user: User):
+    """Test that the stream endpoint writes one JSON object per line for every active item."""
+    _create_items(session, test_user, [(f"Item {i}", 10.0 + i, "school") for i in range(5)])
+    session.add(Item(title="Sold Item", price=1.0, category="school", is_active=False, seller_id=test_user.id))
+    session.commit()
+
+    response = client.get("/items/active/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.strip().split("\n")
+    items = [json.loads(line) for line in lines]
+    assert [item["title"] for item in items] == [f"Item {i}" for i in range(5)]
+    assert items[0]["seller"]["email"] == test_user.email
+
+
+def test_stream_active_items_json_array(client: TestClient, session: Session, test_user: User, monkeypatch):
+    """Test the JSON array format across several streamed batches."""
+    monkeypatch.setattr("backend.routes.items.STREAM_BATCH_SIZE", 2)
+    _create_items(session, test_user, [(f"Item {i}", 10.0, "school") for i in range(5)])
+
+    response = client.get("/items/active/stream", params={"format": "json"})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == [f"Item {i}" for i in range(5)]
+
+    empty = client.get("/items/active/stream", params={"format": "json", "category": "tickets"})
+    assert empty.json() == []
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_share_one_event_loop(client: TestClient, test_item: Item):
+    """Test that many in-flight requests are served concurrently by a single app instance."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+        responses = await asyncio.gather(*[
+            async_client.get("/items/active", params={"limit": 10 + i}) for i in range(20)
+        ])
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json()[0]["title"] == "Test Item" for response in responses)
+
+
+def test_create_items_bulk_with_row_errors(client: TestClient, auth_token: str, test_user: User, count_queries):
+    """Test that valid payloads are created in one insert and invalid ones are reported by index."""
+    payloads = [
+        {"title": "Desk Lamp", "price": 15.0, "category": "living"},
+        {"title": "No Price", "category": "living"},
+        {"title": "Free Couch", "price": 0, "category": "living"},
+        {"title": "Mini Fridge", "price": 60.0, "category": "living", "description": "Barely used"},
+    ]
+    with count_queries() as statements:
+        response = client.post("/items/bulk", json=payloads, headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 201
+    body = response.json()
+    assert [item["title"] for item in body["created"]] == ["Desk Lamp", "Mini Fridge"]
+    assert all(item["seller"]["email"] == test_user.email for item in body["created"])
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert body["errors"][1]["detail"] == "Price must be a positive number"
+    assert sum(statement.lstrip().upper().startswith("INSERT INTO ITEM ") for statement in statements) == 1
+
+    active = client.get("/items/active").json()
+    assert {item["title"] for item in active} == {"Desk Lamp", "Mini Fridge"}
+    assert client.get("/items/search", params={"q": "fridge"}).json()[0]["title"] == "Mini Fridge"
+
+
+def test_create_items_bulk_limits(client: TestClient, auth_token: str, monkeypatch):
+    """Test the batch size cap, the all-invalid case and the in-flight row budget."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    item = {"title": "Poster", "price": 5.0, "category": "living"}
+
+    assert client.post("/items/bulk", json=[], headers=headers).status_code == 400
+    assert client.post("/items/bulk", json=[item]).status_code == 401
+
+    monkeypatch.setattr("backend.routes.items.BULK_MAX_ITEMS", 2)
+    assert client.post("/items/bulk", json=[item] * 3, headers=headers).status_code == 413
+
+    response = client.post("/items/bulk", json=[{"title": "Poster"}], headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["index"] == 0
+
+    from backend.routes.items import bulk_row_budget
+    monkeypatch.setattr(bulk_row_budget, "max_rows", 2)
+    monkeypatch.setattr(bulk_row_budget, "in_flight", 1)  # Another bulk request is mid-insert
+    response = client.post("/items/bulk", json=[item] * 2, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_bulk_mark_sold_and_delete_keep_owner_rule(client: TestClient, session: Session, test_user: User, admin_user: User, auth_token: str, count_queries):
+    """Test that a non-admin's bulk action only touches their own items, in one statement."""
+    mine = [_post_item(client, auth_token, f"Mine {i}")["id"] for i in range(3)]
+    _create_items(session, admin_user, [("Not Mine", 10.0, "school")])
+    theirs = session.exec(select(Item.id).where(Item.title == "Not Mine")).one()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries() as statements:
+        response = client.put("/items/bulk/mark-sold", json={"ids": [*mine[:2], theirs]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2}
+    assert sum(statement.lstrip().upper().startswith("UPDATE ITEM ") for statement in statements) == 1
+    assert {item["title"] for item in client.get("/items/active").json()} == {"Mine 2", "Not Mine"}
+    assert client.get("/items/search", params={"q": "mine"}).json()[0]["title"] == "Mine 2"
+
+    response = client.post("/items/bulk/delete", json={"seller_id": admin_user.id}, headers=headers)
+    assert response.json() == {"affected": 0}
+    response = client.post("/items/bulk/delete", json={"category": "school"}, headers=headers)
+    assert response.json() == {"affected": 3}
+    assert [item["title"] for item in client.get("/items/active").json()] == ["Not Mine"]
+
+
+def test_bulk_admin_actions_by_filter(client: TestClient, session: Session, test_user: User, admin_token: str):
+    """Test admin bulk actions by category and created_before, and that a selection is required."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+    session.add(Item(title="Stale Ticket", price=5.0, category="tickets", seller_id=test_user.id, created_at=old))
+    session.add(Item(title="Legacy Ticket", price=5.0, category="tickets", seller_id=test_user.id))
+    session.add(Item(title="Fresh Ticket", price=5.0, category="tickets", seller_id=test_user.id))
+    session.add(Item(title="Hoodie", price=20.0, category="apparel", seller_id=test_user.id, created_at=old))
+    session.commit()
+    # Listed before created_at existed
+    session.exec(update(Item).where(Item.title == "Legacy Ticket").values(created_at=None))
+    session.commit()
+
+    assert client.post("/items/bulk/delete", json={}, headers=headers).status_code == 400
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    response = client.post("/items/bulk/delete", json={"category": "tickets", "created_before": cutoff}, headers=headers)
+    assert response.json() == {"affected": 2}
+    response = client.put("/items/bulk/mark-sold", json={"seller_id": test_user.id}, headers=headers)
+    assert response.json() == {"affected": 2}
+    assert client.get("/items/active").json() == []
+
+
+def test_bulk_created_before_with_offset(client: TestClient, session: Session, test_user: User, admin_token: str):
+    """Test that a created_before cutoff with a non-UTC offset is compared as the same instant in UTC."""
+    now = datetime.now(timezone.utc)
+    session.add(Item(title="Two Hours Old", price=5.0, category="tickets", seller_id=test_user.id, created_at=now - timedelta(hours=2)))
+    session.add(Item(title="Just Listed", price=5.0, category="tickets", seller_id=test_user.id, created_at=now))
+    session.commit()
+
+    cutoff = (now - timedelta(hours=1)).astimezone(timezone(timedelta(hours=5))).isoformat()
+    response = client.post("/items/bulk/delete", json={"created_before": cutoff}, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json() == {"affected": 1}
+    assert [item["title"] for item in client.get("/items/active").json()] == ["Just Listed"]
@@ -0,0 +1,65 @@
+"""
+Tests for the Prometheus /metrics endpoint.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.parser import text_string_to_metric_families
+from backend.models import Item
+
+
+def _samples(text: str) -> dict:
+    """(sample name, sorted labels) -> value"""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def test_metrics_exposes_requests_and_components(client: TestClient, test_item: Item):
+    """Test per-route request counters, latency histograms and component metrics in Prometheus text format."""
+    before = _samples(client.get("/metrics").text)
+    client.get("/items/active")
+    client.get("/items/active")
+    client.get("/items/999999/not-a-route")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    after = _samples(response.text)
+
+    key = ("http_requests_total", (("method", "GET"), ("route", "/items/active"), ("status", "200")))
+    assert after[key] - before.get(key, 0) == 2
+    assert ("http_requests_total", (("method", "GET"), ("route", "unmatched"), ("status", "404"))) in after
+    assert ("http_request_duration_seconds_count", (("method", "GET"), ("route", "/items/active"))) in after
+    assert after[("cache_hits_total", (("cache", "catalog"),))] >= 1
+    assert ("bcrypt_queue_depth", ()) in after
+    assert ("db_pool_checked_out", ()) in after
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path: Path):
+    """Test that samples recorded by separate processes are summed in multiprocess mode."""
+    worker = (
+        "from backend.metrics import observe_request\n"
+        "observe_request('GET', '/items/active', 200, 0.01)\n"
+        "observe_request('GET', '/items/active', 200, 0.02)\n"
+    )
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        "PYTHONPATH": str(Path(__file__).parents[2]),
+    }
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    value = registry.get_sample_value(
+        "http_requests_total", {"method": "GET", "route": "/items/active", "status": "200"}
+    )
+    assert value == 4
@@ -3,9 +3,13 @@ Tests for the database seed script.
 """
 
 import pytest
+from sqlalchemy.dialects import postgresql
 from sqlmodel import Session, select
 from backend.models import User, Item
-from backend.scripts.seed_db import create_seed_users, create_seed_items, SEED_USERS
+from backend.scripts.seed_db import (
+    copy_statement, create_load_test_items, create_load_test_users, create_seed_users, create_seed_items,
+    generate_load_test_items, SEED_USERS
+)
 
 
 def test_create_seed_users(session: Session):
@@ -113,3 +117,29 @@ def test_admin_users_created(session: Session):
     assert users["admin1@ufl.edu"].is_admin is True
     assert users["admin2@ufl.edu"].is_admin is True
     assert users["user1@ufl.edu"].is_admin is False
+
+
+def test_load_test_data_reproducible_and_idempotent(session: Session):
+    """Test that synthetic users and items are deterministic for a seed and aren't duplicated on rerun."""
+    seller_ids = create_load_test_users(session, 3, workers=2)
+    assert len(seller_ids) == 3
+    assert session.exec(select(User.username).where(User.id == seller_ids[0])).one() == "loadtest1"
+
+    create_load_test_items(session, 250, seller_ids, seed=7)
+    create_load_test_items(session, 250, seller_ids, seed=7)
+    items = session.exec(select(Item.title, Item.price, Item.seller_id, Item.created_at).order_by(Item.id)).all()
+    assert len(items) == 250
+    assert all(seller_id in seller_ids for _, _, seller_id, _ in items)
+
+    generated = list(generate_load_test_items(250, seller_ids, seed=7))
+    assert [(row["title"], row["price"]) for row in generated] == [(title, price) for title, price, _, _ in items]
+    assert list(generate_load_test_items(250, seller_ids, seed=8)) != generated
+
+
+def test_copy_statement_quotes_reserved_names():
+    """Test that the PostgreSQL COPY statement quotes the reserved "user" table name."""
+    dialect = postgresql.dialect()
+    assert copy_statement(dialect, User.__table__, ["username", "email", "is_admin"]) == (
+        'COPY "user" (username, email, is_admin) FROM STDIN WITH (FORMAT csv)'
+    )
+    assert copy_statement(dialect, Item.__table__, ["title", "price"]) == "COPY item (title, price) FROM STDIN WITH (FORMAT csv)"
@@ -0,0 +1,47 @@
+"""
+Tests for the slow-query recorder.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.models import Item
+from backend.slow_queries import parameter_shape, slow_query_log
+
+
+@pytest.fixture(name="record_all_queries")
+def record_all_queries_fixture(monkeypatch):
+    """Treat every statement as slow for the duration of the test."""
+    monkeypatch.setattr(slow_query_log, "threshold_seconds", 0)
+    slow_query_log.clear()
+    yield
+    slow_query_log.clear()
+
+
+def test_parameter_shape_hides_values():
+    """Test that only parameter names and types are kept."""
+    assert parameter_shape({"username": "alice", "limit": 5}) == {"username": "str", "limit": "int"}
+    assert parameter_shape(("alice", 5)) == ["str", "int"]
+    assert parameter_shape(tuple(range(100))) == {"count": 100, "types": ["int"]}
+
+
+def test_slow_queries_record_route_and_plan(client: TestClient, test_item: Item, admin_token: str, record_all_queries):
+    """Test that slow statements are captured with their route and query plan, admin only."""
+    client.get("/items/active", params={"category": "school", "limit": 5})
+
+    response = client.get("/internal/slow-queries", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    body = response.json()
+    catalog_query = next(entry for entry in body["entries"] if entry["route"] == "GET /items/active")
+    assert catalog_query["statement"].lstrip().upper().startswith("SELECT")
+    assert "str" in catalog_query["parameters"]  # The category filter, without its value
+    assert any("ix_item_active_category" in line for line in catalog_query["plan"])
+    assert body["recorded"] >= len(body["entries"])
+
+    response = client.delete("/internal/slow-queries", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+
+
+def test_slow_queries_admin_only(client: TestClient, auth_token: str):
+    """Test that regular users can't read the slow-query log."""
+    response = client.get("/internal/slow-queries", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 403
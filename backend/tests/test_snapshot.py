@@ -0,0 +1,155 @@
+"""
+Tests for the precompressed catalog snapshot behind GET /items/active.
+"""
+
+import asyncio
+import gzip
+import brotli
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from backend.main import app
+from backend.models import Item, User
+from backend.routes.items import catalog_snapshot, prepare_catalog_snapshot
+from backend.snapshot import accepted_encodings
+
+
+def add_items(session: Session, seller: User, count: int):
+    for i in range(count):
+        session.add(Item(title=f"Snapshot Item {i}", price=10.0 + i, category="school", seller_id=seller.id))
+    session.commit()
+
+
+def test_accepted_encodings():
+    """Test that Accept-Encoding is ranked by q-value, preferring brotli on ties and always allowing identity."""
+    assert accepted_encodings("") == [None]
+    assert accepted_encodings("gzip, deflate, br") == ["br", "gzip", None]
+    assert accepted_encodings("gzip;q=1.0, br;q=0.5") == ["gzip", "br", None]
+    assert accepted_encodings("br;q=0, gzip") == ["gzip", None]
+    assert accepted_encodings("*") == ["br", "gzip", None]
+    assert accepted_encodings("identity") == [None]
+
+
+def test_snapshot_served_by_encoding_without_queries(client: TestClient, session: Session, test_user: User, count_queries):
+    """Test that unfiltered /items/active comes from the snapshot files, matching the live response byte for byte."""
+    add_items(session, test_user, 30)
+    live = client.get("/items/active", params={"sort": "newest"})  # Any query string bypasses the snapshot
+    asyncio.run(catalog_snapshot.rebuild())
+
+    with count_queries() as statements:
+        for accept_encoding, content_encoding, decompress in (
+            ("br, gzip", "br", brotli.decompress),
+            ("gzip", "gzip", gzip.decompress),
+            ("identity", None, lambda body: body),
+        ):
+            with client.stream("GET", "/items/active", headers={"Accept-Encoding": accept_encoding}) as response:
+                raw = b"".join(response.iter_raw())
+            assert response.status_code == 200
+            assert response.headers.get("content-encoding") == content_encoding
+            assert "Accept-Encoding" in response.headers["vary"]
+            assert decompress(raw) == live.content
+
+        etag = response.headers["etag"]
+        response = client.get("/items/active", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+        assert response.status_code == 304
+    assert statements == []
+
+
+def test_write_bypasses_snapshot_until_rebuilt(client: TestClient, session: Session, test_user: User, auth_token: str):
+    """Test that after an item write the snapshot isn't served until it has been rebuilt with the write."""
+    add_items(session, test_user, 3)
+    asyncio.run(catalog_snapshot.rebuild())
+
+    response = client.post(
+        "/items",
+        json={"title": "Fresh Listing", "price": 5.0, "category": "living"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 201
+    assert catalog_snapshot.dirty
+
+    response = client.get("/items/active")
+    assert "content-encoding" not in response.headers
+    assert response.json()[0]["title"] == "Fresh Listing"
+
+
+def returning(body: bytes, version: int):
+    async def build():
+        return body, version
+    return build
+
+
+def test_older_build_never_replaces_newer(client: TestClient, monkeypatch):
+    """Test that a build finishing after a newer one isn't served, and that every encoding comes from the newest build."""
+    monkeypatch.setattr(catalog_snapshot, "build", returning(b'["newer"]', 7))
+    asyncio.run(catalog_snapshot.rebuild())
+    monkeypatch.setattr(catalog_snapshot, "build", returning(b'["older"]', 5))
+    asyncio.run(catalog_snapshot.rebuild())  # Started before the newer build, finished after it (e.g. in another worker)
+
+    for accept_encoding in ("br", "gzip", "identity"):
+        assert client.get("/items/active", headers={"Accept-Encoding": accept_encoding}).json() == ["newer"]
+    assert catalog_snapshot.stats()["version"] == 7
+
+    for version in (8, 9):
+        monkeypatch.setattr(catalog_snapshot, "build", returning(b"[]", version))
+        asyncio.run(catalog_snapshot.rebuild())
+    # Older versions are pruned, keeping the previous one
+    assert [catalog_snapshot.version_of(name) for name in catalog_snapshot.versions()] == [8, 9]
+
+
+def test_startup_discards_versions_from_another_database(client: TestClient, monkeypatch):
+    """Test that snapshot builds found at startup are dropped, and not served until this process has rebuilt."""
+    monkeypatch.setattr(catalog_snapshot, "build", returning(b'["elsewhere"]', 40))
+    asyncio.run(catalog_snapshot.rebuild())
+    prepare_catalog_snapshot()
+    assert catalog_snapshot.versions() == []
+    assert catalog_snapshot.dirty
+    assert client.get("/items/active").json() == []
+
+
+def test_restart_after_out_of_band_insert(client: TestClient, session: Session, test_user: User, monkeypatch):
+    """Test that items written without the change log (e.g. by the seed script) replace a snapshot of the same version."""
+    asyncio.run(catalog_snapshot.rebuild())
+    assert client.get("/items/active", headers={"Accept-Encoding": "gzip"}).json() == []
+
+    add_items(session, test_user, 1)  # While the server is down; the change log stays at seq 0
+    prepare_catalog_snapshot()
+    asyncio.run(catalog_snapshot.rebuild())
+    monkeypatch.setattr(catalog_snapshot, "dirty", False)  # Built without waiting for the debounce
+    response = client.get("/items/active", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"  # From the snapshot
+    assert [item["title"] for item in response.json()] == ["Snapshot Item 0"]
+
+    add_items(session, test_user, 1)  # Even without a restart, a build with a different body is served
+    asyncio.run(catalog_snapshot.rebuild())
+    response = client.get("/items/active", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 2
+    assert response.headers["x-changes-since"] == "0"
+
+
+@pytest.mark.anyio
+async def test_rebuild_debounced_after_writes(client: TestClient, auth_token: str, monkeypatch):
+    """Test that a burst of writes triggers one background rebuild, after which the snapshot is served again."""
+    monkeypatch.setattr(catalog_snapshot, "debounce_seconds", 0.5)
+    builds = catalog_snapshot.stats()["builds"]
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+        for i in range(3):
+            response = await async_client.post(
+                "/items", json={"title": f"Burst {i}", "price": 1.0 + i, "category": "tickets"}, headers=headers
+            )
+            assert response.status_code == 201
+        assert catalog_snapshot.dirty
+
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            if not catalog_snapshot.dirty:
+                break
+        assert not catalog_snapshot.dirty
+        assert catalog_snapshot.stats()["builds"] == builds + 1
+
+        response = await async_client.get("/items/active", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert [item["title"] for item in response.json()] == ["Burst 2", "Burst 1", "Burst 0"]
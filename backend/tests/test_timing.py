@@ -0,0 +1,58 @@
+"""
+Tests for per-request timing, the Server-Timing header and request logging.
+"""
+
+import json
+import logging
+from fastapi.testclient import TestClient
+from backend.models import Item
+from backend.timing import RequestTimings, current_timings, request_logger, timed
+
+
+def _server_timing(response) -> dict[str, str]:
+    return {metric.split(";")[0].strip(): metric for metric in response.headers["server-timing"].split(",")}
+
+
+def test_server_timing_counts_db_statements(client: TestClient, test_item: Item, count_queries):
+    """Test that the header reports DB time and the same statement count the engine saw."""
+    with count_queries() as statements:
+        response = client.get("/items/active", params={"limit": 10})
+    metrics = _server_timing(response)
+    assert f'desc="{len(statements)} statements"' in metrics["db"]
+    assert "serialize" in metrics
+    assert "total" in metrics
+    assert "auth" not in metrics
+
+
+def test_server_timing_includes_auth_and_bcrypt(client: TestClient, auth_token: str):
+    """Test that authenticated requests report auth time and logins report bcrypt time."""
+    response = client.get("/secure-data", headers={"Authorization": f"Bearer {auth_token}"})
+    assert "auth" in _server_timing(response)
+
+    response = client.post("/login", data={"username": "testuser@ufl.edu", "password": "TestPass1!"})
+    assert "bcrypt" in _server_timing(response)
+
+
+def test_request_log_line(client: TestClient, test_item: Item, caplog, monkeypatch):
+    """Test that each request logs one JSON line with its route template and timings."""
+    monkeypatch.setattr(request_logger, "propagate", True)  # Let caplog's root handler see the records
+    with caplog.at_level(logging.INFO, logger="backend.requests"):
+        client.delete(f"/items/{test_item.id}")
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["route"] == "/items/{item_id}"
+    assert entry["status"] == 401
+    assert {"duration_ms", "db_ms", "db_statements", "auth_ms", "serialize_ms"} <= entry.keys()
+
+
+def test_timed_outside_a_request_is_a_no_op():
+    """Test that timing helpers do nothing when no request is being timed."""
+    with timed("auth"):
+        pass
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with timed("auth"):
+            pass
+    finally:
+        current_timings.reset(token)
+    assert timings.auth_seconds > 0
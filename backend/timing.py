@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import os
+import orjson
+
+load_dotenv()
+REQUEST_LOG = os.environ.get("REQUEST_LOG", "true").lower() in ("1", "true", "yes")
+
+# One JSON line per request; attach handlers/formatters to this logger to ship it elsewhere
+request_logger = logging.getLogger("backend.requests")
+if REQUEST_LOG and not request_logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    request_logger.addHandler(handler)
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+
+
+class RequestTimings:
+    """Where one request's time went. Phases can overlap (auth includes its user lookup's DB time)."""
+
+    __slots__ = ("scope", "started", "db_seconds", "db_statements", "auth_seconds", "bcrypt_seconds", "serialize_seconds")
+
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope or {}  # The ASGI scope; routing adds the matched route to it
+        self.started = perf_counter()
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.auth_seconds = 0.0
+        self.bcrypt_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in ms) for the work done so far"""
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_statements} statements"']
+        if self.auth_seconds:
+            metrics.append(f"auth;dur={self.auth_seconds * 1000:.2f}")
+        if self.bcrypt_seconds:
+            metrics.append(f"bcrypt;dur={self.bcrypt_seconds * 1000:.2f}")
+        if self.serialize_seconds:
+            metrics.append(f"serialize;dur={self.serialize_seconds * 1000:.2f}")
+        metrics.append(f"total;dur={(perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+# Timings of the request being handled; contextvars follow it into awaited code, SQLAlchemy's greenlets and threadpool calls
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+def current_route() -> str | None:
+    """Route of the request being handled as "METHOD /template", or None outside a request"""
+    timings = current_timings.get()
+    if timings is None or "method" not in timings.scope:
+        return None
+    route = timings.scope.get("route")
+    return f'{timings.scope["method"]} {getattr(route, "path", timings.scope["path"])}'
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the block's wall time to `<phase>_seconds` of the current request, if there is one"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        attribute = f"{phase}_seconds"
+        setattr(timings, attribute, getattr(timings, attribute) + perf_counter() - start)
+
+
+# Registered on the Engine class, so every engine (sync, async, replica, test) is covered
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timings.get() is not None:
+        context._timing_started = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings.get()
+    if timings is not None and hasattr(context, "_timing_started"):
+        timings.db_seconds += perf_counter() - context._timing_started
+        timings.db_statements += 1
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware that times each HTTP request, adds a Server-Timing header (db, auth, bcrypt,
+    serialize, total) and logs one JSON line when the response is finished. Work done after the headers
+    are sent, such as a streamed body, only shows up in the log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope)
+        token = current_timings.set(timings)
+        status_code = 500  # Reported if the app raises before starting a response
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [*message.get("headers", ()), (b"server-timing", timings.server_timing().encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            if request_logger.isEnabledFor(logging.INFO):
+                route = scope.get("route")
+                request_logger.info(orjson.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),  # Path template, e.g. /items/{item_id}
+                    "status": status_code,
+                    "duration_ms": round((perf_counter() - timings.started) * 1000, 2),
+                    "db_ms": round(timings.db_seconds * 1000, 2),
+                    "db_statements": timings.db_statements,
+                    "auth_ms": round(timings.auth_seconds * 1000, 2),
+                    "bcrypt_ms": round(timings.bcrypt_seconds * 1000, 2),
+                    "serialize_ms": round(timings.serialize_seconds * 1000, 2),
+                }).decode())
@@ -48,6 +48,7 @@ export function Dashboard({ userEmail, onLogout, onNavigateToProfile, onNavigate
     category: string;
     description?: string;
     image?: string;
+    image_hash?: string | null;
     is_active: boolean;
     seller?: { email: string };
   }): Listing => ({
@@ -57,11 +58,14 @@ export function Dashboard({ userEmail, onLogout, onNavigateToProfile, onNavigate
     seller: item.seller?.email || userEmail,
     seller_id: item.seller_id,
     category: item.category,
-    image: item.image || 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=400',
+    // Uploaded images are shown through their card-sized variant rather than the full-size original
+    image: item.image_hash
+      ? `${apiUrl}/images/${item.image_hash}/card`
+      : item.image || 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=400',
     description: item.description,
     isSold: !item.is_active,
     is_active: item.is_active,
-  }), [userEmail]);
+  }), [userEmail, apiUrl]);
 
   // Fetch listings from API or use mock data
   const fetchListings = useCallback(async () => {